@@ -1,105 +1,574 @@
-from flask import Flask, render_template, request, jsonify
+from utils.startup import Startup
+startup = Startup()
+
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
 import os
+import threading
+import time
+import atexit
 import json
+import itertools
 import pickle
+import copy
+from collections import deque
 import numpy as np
-from tensorflow.keras.models import load_model
-from utils.preprocessor import clean_up_sentence, bag_of_words
-from transformers import pipeline, AutoTokenizer, AutoModelForSeq2SeqLM
+from utils.preprocessor import (clean_up_sentence, sparse_bag_of_words, lemmas_to_columns,
+                                load_word_index, build_word_index, set_text_engine)
+from utils.text_engine import LemmaTable, TextPreprocessor, load_lemma_table
+from utils.batching import MicroBatcher
+from utils.numpy_model import NumpyIntentModel
+from utils.quantization import QuantizedIntentModel
+from utils.retrieval import PatternIndex
+from utils.generation import GenerationService, load_generation_model
+from utils.transcripts import TranscriptLogger
+from utils.artifact_bundle import ArtifactBundle, BundleIntegrityError
+from utils.registry import ArtifactRegistry, RegistryError, RegistryWatcher
+from utils.crisis import CrisisDetector
+from utils.responses import ResponseTable
+from utils.sessions import open_session_store
+from utils.cache import LRUCache
+from utils.metrics import Metrics, SlowRequestProfiler
+startup.checkpoint('imports')
 
 # Initialize Flask app
 app = Flask(__name__)
 
-# Load files and models
-try:
-    # Basic intent model
-    words = pickle.load(open('models/words.pkl', 'rb'))
-    classes = pickle.load(open('models/classes.pkl', 'rb'))
-    model = load_model('models/mental_health_chatbot_model.h5')
-    
-    # Load intents
-    with open('models/mental_health_intents.json', 'r') as f:
-        intents = json.load(f)
-    
-    # Safety responses
-    safety_responses = {
-        "crisis": "I notice you might be in distress. Please remember that immediate help is available by calling 988 (US) or your local crisis line. Would you like information about mental health resources?",
-        "harm": "I'm concerned about what you're sharing. Please reach out to a crisis helpline immediately at 988 (US) or your local emergency number.",
-        "emergency": "This sounds urgent. Please contact emergency services or go to your nearest emergency room. Your wellbeing is important."
-    }
+# Inference backend for the intent model: "keras", "numpy", "quantized" or
+# "bundle". "quantized" runs the int8 weights written by train_model.py or
+# quantize_model.py. "bundle" maps one versioned artifact file (vocabulary, classes, weights and
+# responses) read-only, so gunicorn workers share its pages.
+MODEL_BACKEND = os.environ.get('MODEL_BACKEND', 'keras')
+BUNDLE_PATH = os.environ.get('ARTIFACT_BUNDLE', 'models/chatbot_bundle.bin')
+
+# Backends that run the NumPy forward pass on sparse inputs
+SPARSE_BACKENDS = ('numpy', 'quantized', 'bundle')
+
+# MODEL_BACKEND=retrieval scores intents by cosine similarity to every
+# training pattern (hashed n-gram embeddings built by train_model.py), so
+# words outside words.pkl still count. Similarities are not probabilities
+# and get their own threshold. RETRIEVAL_ANN_LISTS > 0 switches to the
+# approximate index for very large pattern sets.
+RETRIEVAL_INDEX = os.environ.get('RETRIEVAL_INDEX', 'models/pattern_index.npz')
+RETRIEVAL_THRESHOLD = float(os.environ.get('RETRIEVAL_THRESHOLD', '0.2'))
+RETRIEVAL_ANN_LISTS = int(os.environ.get('RETRIEVAL_ANN_LISTS', '0'))
+
+INTENTS_PATH = 'models/mental_health_intents.json'
+
+# Set a threshold for prediction confidence
+ERROR_THRESHOLD = 0.25
+
+# Text preprocessing: "nltk" calls nltk.word_tokenize and WordNet per
+# message, "compiled" uses the precompiled regex tokenizer with a lemma memo
+# seeded from the vocabulary (WordNet only on a miss), and "frozen" serves
+# lemmas from the table train_model.py saves and never touches WordNet.
+TEXT_PREPROCESSOR = os.environ.get('TEXT_PREPROCESSOR', 'compiled')
+LEMMA_TABLE_PATH = os.environ.get('LEMMA_TABLE', 'models/lemmas.pkl')
+LEMMA_MEMO_SIZE = int(os.environ.get('LEMMA_MEMO_SIZE', '100000'))
+
+# Largest batch accepted by /classify_batch in a single JSON request
+MAX_BATCH_MESSAGES = int(os.environ.get('MAX_BATCH_MESSAGES', '1000'))
+BATCH_CHUNK_SIZE = 256
+
+# Per-stage latency histograms and counters served at /metrics. Set
+# METRICS_DIR to a directory shared by all gunicorn workers to aggregate
+# across them, and PROFILE_SLOWEST=N to keep stacks of the N slowest requests.
+PROFILE_SLOWEST = int(os.environ.get('PROFILE_SLOWEST', '0'))
+metrics = Metrics(
+    shared_dir=os.environ.get('METRICS_DIR'),
+    profiler=SlowRequestProfiler(top_n=PROFILE_SLOWEST) if PROFILE_SLOWEST > 0 else None,
+)
+
+# Crisis lexicon, compiled once and hot-reloaded when the file changes.
+# Loaded outside the model try block so the safety check never depends on
+# the model artifacts being present.
+crisis_detector = CrisisDetector(os.environ.get('CRISIS_LEXICON', 'data/crisis_lexicon.json'))
+
+# Ranked intent lists keyed on the message's vocabulary columns, so
+# near-identical messages ("hi", "Hi!") skip the model entirely
+CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', '10000'))
+prediction_cache = LRUCache(
+    max_entries=CACHE_SIZE,
+    max_bytes=int(float(os.environ.get('PREDICTION_CACHE_MB', '16')) * 1024 * 1024),
+    ttl=float(os.environ.get('PREDICTION_CACHE_TTL', '3600')),
+) if CACHE_SIZE > 0 else None
+
+# Bumped on every model swap and carried in the cache keys
+model_generation = 0
+
+# MODEL_BACKEND=bundle with REGISTRY_DIR set serves the registry's current
+# version instead of BUNDLE_PATH. Every worker polls the registry every
+# REGISTRY_POLL seconds and, when train_model.py publishes (or an admin
+# rolls back), loads and warms the new version in the background before
+# swapping it in. Requests in flight finish on the version they started on.
+REGISTRY_DIR = os.environ.get('REGISTRY_DIR')
+REGISTRY_POLL = float(os.environ.get('REGISTRY_POLL', '5'))
+# Seconds a replaced Keras micro-batcher keeps serving in-flight requests
+RETIRE_GRACE = 30.0
+if REGISTRY_DIR and MODEL_BACKEND != 'bundle':
+    raise ValueError("REGISTRY_DIR needs MODEL_BACKEND=bundle")
+registry = ArtifactRegistry(REGISTRY_DIR) if REGISTRY_DIR else None
+registry_watcher = None
+# Reentrant: a /reload that reloads the model goes through swap_model
+swap_lock = threading.RLock()
+swap_history = deque(maxlen=20)
+
+# The ModelState being served, set during warm-up
+active = None
+
+# /reload only reaches the worker that receives it, so it also rewrites
+# RELOAD_STAMP (shared by every worker on the host) and each worker redoes
+# the reload when it sees the stamp change, checking at most every
+# RELOAD_POLL seconds
+RELOAD_STAMP = os.environ.get('RELOAD_STAMP', 'models/reload.stamp')
+RELOAD_POLL = float(os.environ.get('RELOAD_POLL', '5'))
+reload_seen = None
+reload_checked = 0.0
+
+# Recent intents per session_id, for no-repeat responses and escalation.
+# SESSION_STORE=sqlite:///path/to/sessions.db shares state across workers.
+session_store = open_session_store(
+    os.environ.get('SESSION_STORE', 'memory'),
+    max_sessions=int(os.environ.get('SESSION_MAX', '100000')),
+    idle_timeout=float(os.environ.get('SESSION_IDLE_TIMEOUT', '1800')),
+    max_bytes=int(float(os.environ.get('SESSION_STORE_MB', '64')) * 1024 * 1024),
+)
+
+# After this many distress intents in a row, and again after every further
+# run of that many, point the user to the crisis resources instead of
+# another intent response (0 disables)
+DISTRESS_TAGS = frozenset(os.environ.get(
+    'DISTRESS_TAGS', 'depression,anxiety,panic_attacks,grief,loneliness,substance_use').split(','))
+ESCALATE_AFTER = int(os.environ.get('ESCALATE_AFTER', '3'))
+
+# Every /get_response exchange, written in batches by a background thread
+# to rotating compressed files for clinical review and retraining. Set
+# TRANSCRIPT_DIR to enable; TRANSCRIPT_FORMAT=parquet needs pyarrow.
+transcripts = TranscriptLogger(
+    os.environ['TRANSCRIPT_DIR'],
+    fmt=os.environ.get('TRANSCRIPT_FORMAT', 'jsonl'),
+    max_queue=int(os.environ.get('TRANSCRIPT_MAX_QUEUE', '10000')),
+    rotate_bytes=int(float(os.environ.get('TRANSCRIPT_ROTATE_MB', '64')) * 1024 * 1024),
+) if os.environ.get('TRANSCRIPT_DIR') else None
+if transcripts is not None:
+    atexit.register(transcripts.close)
+
+# Seq2seq replies for /get_advanced_response: "stub", "tiny" or
+# "transformer"; unset serves the intent response there
+GENERATION_BACKEND = os.environ.get('GENERATION_BACKEND', '')
+MAX_NEW_TOKENS = int(os.environ.get('MAX_NEW_TOKENS', '64'))
+generation_service = None
+
+# Safety responses
+safety_responses = {
+    "crisis": "I notice you might be in distress. Please remember that immediate help is available by calling 988 (US) or your local crisis line. Would you like information about mental health resources?",
+    "harm": "I'm concerned about what you're sharing. Please reach out to a crisis helpline immediately at 988 (US) or your local emergency number.",
+    "emergency": "This sounds urgent. Please contact emergency services or go to your nearest emergency room. Your wellbeing is important."
+}
+
+class ModelState:
+    """
+    One loaded version of the intent artifacts. Requests read the active
+    state once and use it throughout, and a reload or hot swap replaces it
+    with a single assignment, so no request mixes two versions' vocabulary,
+    classes, weights and responses.
+    """
+
+    def __init__(self, words, classes, word_index, model, response_table, version=None, text_engine=None,
+                 batcher=None):
+        self.words = words
+        self.classes = classes
+        self.word_index = word_index
+        self.model = model
+        self.response_table = response_table
+        self.version = version
+        self.text_engine = text_engine
+        self.batcher = batcher
+        self.generation = 0
+
+def load_model_state(version=None):
+    """
+    Load the vocabulary, classes, intent model and responses into a new
+    ModelState without touching the one being served. version picks a
+    registry version, by default the current one.
+    """
+    lemma_path = LEMMA_TABLE_PATH
+    if MODEL_BACKEND == 'bundle':
+        bundle_path = BUNDLE_PATH
+        if registry is not None:
+            version = version or registry.current()
+            if version is None:
+                raise RegistryError(f"no model version has been published to {REGISTRY_DIR}")
+            registry.verify(version)
+            bundle_path = registry.path(version, 'chatbot_bundle.bin')
+            if os.path.exists(registry.path(version, 'lemmas.pkl')):
+                lemma_path = registry.path(version, 'lemmas.pkl')
+        # Checks the bundle's integrity hash before anything is used
+        bundle = ArtifactBundle(bundle_path)
+        words = bundle.words
+        classes = bundle.classes
+        word_index = build_word_index(words)
+        model = NumpyIntentModel(layers=bundle.layers)
+        response_table = ResponseTable(bundle.intents)
+        version = bundle.version if registry is None else version
+        print(f"Loaded artifact bundle version {version}")
+    else:
+        words = pickle.load(open('models/words.pkl', 'rb'))
+        classes = pickle.load(open('models/classes.pkl', 'rb'))
+        word_index = load_word_index('models/word_index.pkl', words)
+        if MODEL_BACKEND == 'numpy':
+            # Same forward pass as three NumPy matmuls, no TensorFlow import
+            model = NumpyIntentModel('models/mental_health_chatbot_weights.npz')
+        elif MODEL_BACKEND == 'quantized':
+            # int8 kernels with per-channel scales. Only the first layer stays
+            # int8 in memory (the hidden layers are dequantized at load), so
+            # resident weights are about 2.5x smaller than float32, not 4x
+            model = QuantizedIntentModel('models/mental_health_chatbot_int8.npz')
+        elif MODEL_BACKEND == 'retrieval':
+            model = PatternIndex.load(RETRIEVAL_INDEX, ann_lists=RETRIEVAL_ANN_LISTS)
+            classes = model.classes
+        else:
+            # TensorFlow is only imported when the Keras backend is enabled
+            keras_models = startup.import_module('tensorflow.keras.models')
+            model = keras_models.load_model('models/mental_health_chatbot_model.h5')
+        # Load intents, compiled into an immutable tag -> responses table
+        response_table = ResponseTable.from_file(INTENTS_PATH)
     
-    print("Models loaded successfully!")
+    batcher = None
+    # Coalesce concurrent predictions into batched forward passes
+    if MODEL_BACKEND == 'keras' and os.environ.get('MICRO_BATCHING', '1') == '1':
+        batcher = MicroBatcher(
+            lambda batch: model.predict(batch, verbose=0),
+            max_batch_size=int(os.environ.get('MICRO_BATCH_MAX_SIZE', '32')),
+            window_ms=float(os.environ.get('MICRO_BATCH_WINDOW_MS', '5')),
+        )
     
-    # Advanced transformer model (uncomment if you want to use it)
-    # model_name = "google/flan-t5-small"
-    # tokenizer = AutoTokenizer.from_pretrained("models/chatbot_tokenizer")
-    # model_advanced = AutoModelForSeq2SeqLM.from_pretrained("models/chatbot_llm_model")
-    # text_generator = pipeline("text2text-generation", model=model_advanced, tokenizer=tokenizer)
-    # print("Transformer model loaded successfully!")
+    # The lemma table is seeded from the vocabulary, so it follows the model
+    return ModelState(words, classes, word_index, model, response_table, version,
+                      make_text_engine(words, lemma_path), batcher)
+
+def make_text_engine(words, lemma_path):
+    """
+    The TEXT_PREPROCESSOR engine, seeded with the vocabulary (None for nltk)
+    """
+    if TEXT_PREPROCESSOR == 'nltk':
+        return None
+    if TEXT_PREPROCESSOR == 'frozen':
+        lemmas = LemmaTable(load_lemma_table(lemma_path), max_size=LEMMA_MEMO_SIZE)
+    else:
+        try:
+            frozen = load_lemma_table(lemma_path)
+        except FileNotFoundError:
+            frozen = {}
+        stem = startup.import_module('nltk.stem')
+        lemmas = LemmaTable(frozen, stem.WordNetLemmatizer().lemmatize, max_size=LEMMA_MEMO_SIZE)
+    lemmas.seed(words)
+    return TextPreprocessor(lemmas)
+
+def warm_state(state, message="Hello"):
+    """
+    Run one message through a state that is not serving yet, so its
+    tokenizer, lemma table and model are loaded before the first request
+    """
+    lemmas = state.text_engine.clean_up_sentence(message) if state.text_engine else clean_up_sentence(message)
+    classify_lemmatized([lemmas], state)
+    if state.batcher is not None:
+        state.batcher.predict(np.zeros(len(state.words), dtype=np.float32))
+
+def activate(state):
+    """
+    Start serving state. Requests already running keep the state they
+    read; the replaced micro-batcher is stopped after RETIRE_GRACE seconds.
+    """
+    global active, model_generation
+    previous = active
+    # Keys carry the generation so an in-flight request can't repopulate
+    # the cache with a prediction from the old model
+    model_generation += 1
+    state.generation = model_generation
+    # Installed just before the model; lemmatization only differs between
+    # versions for tokens one vocabulary has and the other lacks
+    set_text_engine(state.text_engine)
+    active = state
+    if prediction_cache is not None:
+        prediction_cache.clear()
+    if previous is not None and previous.batcher is not None and previous.batcher is not state.batcher:
+        retire = threading.Timer(RETIRE_GRACE, previous.batcher.stop)
+        retire.daemon = True
+        retire.start()
+    return previous
+
+def swap_model(version=None, force=False):
+    """
+    Load, warm and activate a model version off to the side, timing each
+    step; returns the swap record also kept in swap_history, or None if
+    version is already being served (unless force)
+    """
+    with swap_lock:
+        if version is not None and not force and active is not None and active.version == version:
+            return None
+        started = time.perf_counter()
+        state = load_model_state(version)
+        loaded = time.perf_counter()
+        warm_state(state)
+        warmed = time.perf_counter()
+        previous = activate(state)
+        done = time.perf_counter()
+    if registry_watcher is not None:
+        registry_watcher.served = state.version
+    record = {
+        'at': time.time(),
+        'from': previous.version if previous is not None else None,
+        'to': state.version,
+        'load_ms': 1000.0 * (loaded - started),
+        'warm_ms': 1000.0 * (warmed - loaded),
+        'activate_ms': 1000.0 * (done - warmed),
+    }
+    swap_history.append(record)
+    metrics.count('model_swap')
+    print(f"Swapped model {record['from']} -> {record['to']} (load {record['load_ms']:.1f}ms, "
+          f"warm {record['warm_ms']:.1f}ms, activate {record['activate_ms']:.3f}ms)")
+    return record
+
+def watch_registry():
+    """
+    Start this worker's registry poller, if serving from a registry
+    """
+    global registry_watcher
+    if registry is None:
+        return
+    if registry_watcher is None:
+        registry_watcher = RegistryWatcher(registry, swap_model, REGISTRY_POLL, active.version)
+    registry_watcher.ensure_started()
+
+def load_generation_service(backend=GENERATION_BACKEND):
+    """
+    Load the process's one generation model behind its batching pool
+    """
+    global generation_service
+    if generation_service is None and backend:
+        generation_service = GenerationService(
+            load_generation_model(backend),
+            workers=int(os.environ.get('GENERATION_WORKERS', '2')),
+            max_batch_size=int(os.environ.get('GENERATION_MAX_BATCH', '8')),
+            window_ms=float(os.environ.get('GENERATION_WINDOW_MS', '10')),
+            max_new_tokens=MAX_NEW_TOKENS,
+            time_budget=float(os.environ.get('GENERATION_TIME_BUDGET', '3')),
+            max_queue=int(os.environ.get('GENERATION_MAX_QUEUE', '64')),
+            cache_size=int(os.environ.get('GENERATION_CACHE_SIZE', '1024')),
+        )
+    return generation_service
 
-except Exception as e:
-    print(f"Error loading models: {e}")
+def warm_up():
+    """
+    Load every artifact the enabled backend needs and push one message
+    through the pipeline, so NLTK and WordNet are loaded before the first
+    real request. Raises on missing or corrupt artifacts.
+    """
+    global reload_seen
+    try:
+        with startup.phase('load intent model'):
+            state = load_model_state()
+        
+        if GENERATION_BACKEND:
+            with startup.phase('load generator'):
+                load_generation_service()
+        
+        with startup.phase('first prediction'):
+            warm_state(state)
+            activate(state)
+        watch_registry()
+        # Reloads from before this process started are already in what it loaded
+        reload_seen = stamp_mtime()
+    except Exception as e:
+        startup.mark_failed(e)
+        print(f"Error loading models: {e}")
+        raise
+    startup.mark_ready()
+    print(f"Models loaded successfully! Startup timings (ms): {startup.status()['timings_ms']}")
 
 # Helper functions
-def predict_class(sentence):
+def predict_class(sentence, state=None):
     """
     Predict the class (intent) of the sentence
     """
-    bow = bag_of_words(sentence, words)
-    res = model.predict(np.array([bow]))[0]
+    state = state or active
+    if MODEL_BACKEND == 'retrieval':
+        return predict_by_retrieval(sentence, state)
+    
+    with metrics.stage('preprocess'):
+        columns = sparse_bag_of_words(sentence, state.words, state.word_index)
     
-    # Set a threshold for prediction confidence
-    ERROR_THRESHOLD = 0.25
-    results = [[i, r] for i, r in enumerate(res) if r > ERROR_THRESHOLD]
+    key = (state.generation, tuple(columns.tolist()))
+    if prediction_cache is not None:
+        cached = prediction_cache.get(key)
+        if cached is not None:
+            return [dict(r) for r in cached]
+    
+    with metrics.stage('predict'):
+        if MODEL_BACKEND in SPARSE_BACKENDS:
+            # Only the weight rows of the words present in the message are used
+            res = state.model.predict_sparse([columns])[0]
+        else:
+            bow = np.zeros(len(state.words), dtype=np.float32)
+            bow[columns] = 1
+            if state.batcher is not None:
+                res = state.batcher.predict(bow)
+            else:
+                res = state.model.predict(np.array([bow]))[0]
+    
+    return_list = rank_intents(res, state)
+    
+    if prediction_cache is not None:
+        prediction_cache.put(key, tuple(dict(r) for r in return_list))
+    
+    return return_list
+
+def predict_by_retrieval(sentence, state):
+    """
+    predict_class for the retrieval backend, keyed on the message's lemmas
+    since every token counts, not just the vocabulary columns
+    """
+    with metrics.stage('preprocess'):
+        lemmas = clean_up_sentence(sentence)
+    
+    key = (state.generation, tuple(lemmas))
+    if prediction_cache is not None:
+        cached = prediction_cache.get(key)
+        if cached is not None:
+            return [dict(r) for r in cached]
+    
+    with metrics.stage('predict'):
+        res = state.model.predict_lemmas([lemmas])[0]
+    
+    return_list = rank_intents(res, state)
+    
+    if prediction_cache is not None:
+        prediction_cache.put(key, tuple(dict(r) for r in return_list))
+    
+    return return_list
+
+def rank_intents(res, state):
+    """
+    Intents above the confidence threshold, most probable first
+    """
+    threshold = RETRIEVAL_THRESHOLD if MODEL_BACKEND == 'retrieval' else ERROR_THRESHOLD
+    results = [[i, r] for i, r in enumerate(res) if r > threshold]
     
     # Sort by probability
     results.sort(key=lambda x: x[1], reverse=True)
     
     return_list = []
     for r in results:
-        return_list.append({'intent': classes[r[0]], 'probability': str(r[1])})
-    
+        return_list.append({'intent': state.classes[r[0]], 'probability': str(r[1])})
     return return_list
 
-def get_response(intents_list, intents_json):
+def predict_proba(column_rows, state):
+    """
+    Class probabilities for a batch of sparse bag-of-words rows in one
+    vectorized forward pass
+    """
+    if MODEL_BACKEND in SPARSE_BACKENDS:
+        return state.model.predict_sparse(column_rows)
+    bow = np.zeros((len(column_rows), len(state.words)), dtype=np.float32)
+    for i, columns in enumerate(column_rows):
+        bow[i, columns] = 1
+    return state.model.predict(bow, verbose=0)
+
+def classify_lemmatized(lemma_lists, state=None):
     """
-    Get a response based on the predicted intent
+    Ranked intents for a chunk of already lemmatized messages
+    """
+    state = state or active
+    if MODEL_BACKEND == 'retrieval':
+        return [rank_intents(res, state) for res in state.model.predict_lemmas(lemma_lists)]
+    rows = [lemmas_to_columns(lemmas, state.word_index) for lemmas in lemma_lists]
+    return [rank_intents(res, state) for res in predict_proba(rows, state)]
+
+def classify_batch_messages(messages):
+    """
+    Crisis severity and ranked intents for each message, featurized and
+    predicted as one batch
+    """
+    intents_lists = classify_lemmatized([clean_up_sentence(m) for m in messages], active)
+    results = []
+    for message, ints in zip(messages, intents_lists):
+        crisis = check_for_crisis(message)
+        results.append({'crisis': crisis.severity if crisis else None, 'intents': ints})
+    return results
+
+def get_response(intents_list, table, session_id=None):
+    """
+    Get a response based on the predicted intent, and with a session_id
+    record the turn in the session store
     """
     # If no intent was predicted with confidence
     if not intents_list:
+        if session_id is not None:
+            session_store.record(session_id, None, 0.0)
         return "I'm not sure I understand. Could you rephrase that?"
     
     tag = intents_list[0]['intent']
-    list_of_intents = intents_json['intents']
-    
-    for i in list_of_intents:
-        if i['tag'] == tag:
-            # Get a random response from the intent
-            import random
-            result = random.choice(i['responses'])
-            
-            # Special handling for crisis messages
-            if tag == "crisis":
-                return safety_responses["crisis"]
-            
-            return result
-    
-    return "I'm not sure how to respond to that."
+    
+    # Special handling for crisis messages
+    if tag == "crisis":
+        if session_id is not None:
+            session_store.record(session_id, tag, float(intents_list[0]['probability']))
+        return safety_responses["crisis"]
+    
+    if session_id is None:
+        result = table.choose(tag)
+    else:
+        state = session_store.get(session_id)
+        distress = tag in DISTRESS_TAGS
+        # Consecutive distress turns including this one, not capped at the
+        # session's HISTORY
+        streak = 1 + (state.distress if state is not None else 0) if distress else 0
+        if ESCALATE_AFTER and streak and streak % ESCALATE_AFTER == 0:
+            metrics.count('escalation')
+            result = safety_responses["crisis"]
+        else:
+            # Don't give the same session the same line twice in a row
+            result = table.choose(tag, avoid=state.response_for(tag) if state is not None else None)
+        session_store.record(session_id, tag, float(intents_list[0]['probability']), result, distress)
+    
+    if result is None:
+        return "I'm not sure how to respond to that."
+    return result
 
 # Check for crisis keywords in the message
 def check_for_crisis(message):
-    crisis_keywords = ["suicide", "kill myself", "end my life", "don't want to live", 
-                      "hurt myself", "self harm", "die", "death"]
-    
-    # Convert to lowercase for case-insensitive matching
-    message_lower = message.lower()
-    
-    for keyword in crisis_keywords:
-        if keyword in message_lower:
-            return True
-    return False
+    """
+    Return the highest-severity crisis lexicon match in the message, or None.
+    The match's severity is one of the safety_responses keys.
+    """
+    return crisis_detector.detect(message)
 
 # Routes
+# Endpoints that need the warmed-up model; they return 503 until it is ready
+MODEL_ENDPOINTS = {'get_bot_response', 'classify_batch', 'get_advanced_response', 'reload_responses', 'rollback'}
+
+@app.before_request
+def require_warm_model():
+    if request.endpoint in MODEL_ENDPOINTS and not startup.ready:
+        return jsonify({'error': 'The chatbot is still starting up, please try again shortly.'}), 503
+
+@app.before_request
+def keep_watching_registry():
+    # The watcher thread doesn't survive a gunicorn fork
+    if registry_watcher is not None:
+        registry_watcher.ensure_started()
+
+@app.route('/ready')
+def ready():
+    """
+    Readiness probe: 200 once warm-up has finished, 503 while it is running
+    and 500 if it failed, with import and warm-up timings either way
+    """
+    status = startup.status()
+    if startup.ready:
+        return jsonify(status)
+    return jsonify(status), 500 if startup.state == 'failed' else 503
+
 @app.route('/')
 def home():
     return render_template('index.html')
@@ -111,32 +580,349 @@ def dashboard():
 
 @app.route('/get_response', methods=['POST'])
 def get_bot_response():
-    user_message = request.json['message']
+    started = time.perf_counter()
+    with metrics.request():
+        with metrics.stage('parse'):
+            data = request.json
+        response = respond(data, started)
+        with metrics.stage('serialize'):
+            return jsonify({'response': response})
+
+def respond(data, started):
+    """
+    The /get_response exchange for a parsed request body, shared by the
+    Flask and ASGI entry points: crisis check, intent prediction, response,
+    counters and transcript
+    """
+    user_message = data['message']
+    # One model version for the whole request, even if a swap lands mid-way
+    state = active
     
     # Check for crisis indicators first
-    if check_for_crisis(user_message):
-        return jsonify({'response': safety_responses["crisis"]})
+    with metrics.stage('crisis_check'):
+        crisis = check_for_crisis(user_message)
+    if crisis:
+        metrics.count('crisis', crisis.severity)
+        if data.get('session_id') is not None:
+            session_store.record(data['session_id'], 'crisis', 1.0)
+        response = safety_responses[crisis.severity]
+        log_transcript(data, [], crisis.severity, response, started, state)
+        return response
     
     # Get regular chatbot response
-    ints = predict_class(user_message)
-    response = get_response(ints, intents)
+    ints = predict_class(user_message, state)
+    if ints:
+        metrics.count('intent', ints[0]['intent'])
+    else:
+        metrics.count('low_confidence')
+    with metrics.stage('respond'):
+        response = get_response(ints, state.response_table, data.get('session_id'))
+    log_transcript(data, ints, None, response, started, state)
+    return response
+
+def log_transcript(data, intents_list, crisis, response, started, state):
+    """
+    Queue one exchange for the transcript writer. Exchanges answered with
+    a safety response (lexicon match, "crisis" intent or escalation) take
+    the lane that is never dropped.
+    """
+    if transcripts is None:
+        return
+    safety = crisis is not None or response in safety_responses.values()
+    transcripts.log({
+        'ts': time.time(),
+        'session_id': data.get('session_id'),
+        'message': data['message'],
+        'intents': [{'intent': r['intent'], 'probability': float(r['probability'])} for r in intents_list],
+        'crisis': crisis,
+        'safety_response': safety,
+        'response': response,
+        'latency_ms': 1000.0 * (time.perf_counter() - started),
+        'model_generation': state.generation,
+        'model_version': state.version,
+    }, crisis=safety)
+
+@app.route('/classify_batch', methods=['POST'])
+def classify_batch():
+    """
+    Classify many messages with the predict_class pipeline.
+
+    A JSON body {"messages": [...]} gets a JSON {"results": [...]} reply.
+    Any other body is read line by line as JSONL ({"message": ...} or a
+    bare string per line) and answered as a JSONL stream, one result per
+    input line, in chunks of BATCH_CHUNK_SIZE. A line that can't be read
+    gets an {"error": ...} result instead. Both forms are capped at
+    MAX_BATCH_MESSAGES messages. Tokenization stays in-process here; use
+    classify_messages.py to spread it across cores for offline scoring.
+    """
+    too_many = {'error': f'at most {MAX_BATCH_MESSAGES} messages per request'}
+    if request.is_json:
+        messages = (request.get_json(silent=True) or {}).get('messages')
+        if not isinstance(messages, list) or not all(isinstance(m, str) for m in messages):
+            return jsonify({'error': 'expected {"messages": [...]} with string messages'}), 400
+        if len(messages) > MAX_BATCH_MESSAGES:
+            return jsonify(too_many), 413
+        return jsonify({'results': classify_batch_messages(messages)})
     
-    return jsonify({'response': response})
+    lines = (line for line in request.stream if line.strip())
+    # The first chunk is read before answering, so an oversized small
+    # batch still gets a 413 rather than a truncated stream
+    first = list(itertools.islice(lines, min(BATCH_CHUNK_SIZE, MAX_BATCH_MESSAGES + 1)))
+    if len(first) > MAX_BATCH_MESSAGES:
+        return jsonify(too_many), 413
+    
+    def generate():
+        chunk, seen = first, 0
+        while chunk:
+            seen += len(chunk)
+            if seen > MAX_BATCH_MESSAGES:
+                yield json.dumps(too_many) + '\n'
+                return
+            parsed = [parse_batch_line(line) for line in chunk]
+            valid = [message for _, message, error in parsed if error is None]
+            results = iter(classify_batch_messages(valid))
+            for record_id, message, error in parsed:
+                result = {'error': error} if error is not None else next(results)
+                if record_id is not None:
+                    result['id'] = record_id
+                yield json.dumps(result) + '\n'
+            chunk = list(itertools.islice(lines, BATCH_CHUNK_SIZE))
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def parse_batch_line(line):
+    """
+    (id, message, error) for one JSONL line of a /classify_batch body
+    """
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None, None, 'invalid JSON'
+    if isinstance(record, str):
+        return None, record, None
+    if not isinstance(record, dict):
+        return None, None, 'expected {"message": ...} or a string'
+    message = record.get('message')
+    if not isinstance(message, str):
+        return record.get('id'), None, 'missing or non-string "message"'
+    return record.get('id'), message, None
+
+def forbidden():
+    """
+    A 403 response unless the request carries X-Admin-Token matching
+    ADMIN_TOKEN. Fails closed: with ADMIN_TOKEN unset every admin request
+    is refused.
+    """
+    admin_token = os.environ.get('ADMIN_TOKEN')
+    if not admin_token or request.headers.get('X-Admin-Token') != admin_token:
+        return jsonify({'error': 'forbidden'}), 403
+    return None
+
+def reload_artifacts(model=False):
+    """
+    Recompile the response table, or with model (always for the bundle,
+    which carries the responses) reload the model artifacts too, and swap
+    the result in atomically in this worker
+    """
+    global active
+    if MODEL_BACKEND == 'bundle' or model:
+        swap_model(active.version if registry is not None else None, force=True)
+        return
+    table = ResponseTable.from_file(INTENTS_PATH)
+    # Same model, new responses: the cached predictions stay valid. Under
+    # the lock so a concurrent model swap isn't undone.
+    with swap_lock:
+        state = copy.copy(active)
+        state.response_table = table
+        active = state
+
+def stamp_mtime():
+    try:
+        return os.path.getmtime(RELOAD_STAMP)
+    except OSError:
+        return None
+
+@app.before_request
+def follow_reloads():
+    """
+    Repeat a /reload another worker received, once the stamp it wrote
+    changes
+    """
+    global reload_seen, reload_checked
+    now = time.monotonic()
+    if not RELOAD_POLL or not startup.ready or now - reload_checked < RELOAD_POLL:
+        return
+    reload_checked = now
+    mtime = stamp_mtime()
+    if mtime is None or mtime == reload_seen:
+        return
+    reload_seen = mtime
+    try:
+        with open(RELOAD_STAMP, 'r') as f:
+            stamp = json.load(f)
+        reload_artifacts(stamp.get('model', False))
+        print(f"Followed /reload from worker {stamp.get('pid')}")
+    except (OSError, ValueError, KeyError, BundleIntegrityError, RegistryError) as e:
+        # Keep serving what is loaded
+        print(f"Error following /reload: {e}")
+
+@app.route('/reload', methods=['POST'])
+def reload_responses():
+    """
+    Recompile mental_health_intents.json and swap the response table in
+    atomically, optionally reloading the model too, in every worker: this
+    one right away and the others within RELOAD_POLL seconds. Requires
+    ADMIN_TOKEN to be set and sent as the X-Admin-Token header.
+    """
+    global reload_seen
+    denied = forbidden()
+    if denied:
+        return denied
+    model = bool((request.get_json(silent=True) or {}).get('model'))
+    try:
+        reload_artifacts(model)
+    except (OSError, ValueError, KeyError, BundleIntegrityError, RegistryError) as e:
+        return jsonify({'error': f'reload failed: {e}'}), 500
+    try:
+        tmp = f'{RELOAD_STAMP}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'model': model, 'at': time.time(), 'pid': os.getpid()}, f)
+        os.replace(tmp, RELOAD_STAMP)
+        reload_seen = stamp_mtime()
+        workers = True
+    except OSError as e:
+        print(f"Error writing {RELOAD_STAMP}, other workers keep their artifacts: {e}")
+        workers = False
+    return jsonify({'reloaded': True, 'intents': len(active.response_table), 'all_workers': workers})
+
+@app.route('/versions')
+def model_versions():
+    """
+    The version being served, the registry's versions and recent swaps
+    with their load, warm and activate times
+    """
+    return jsonify({
+        'active': active.version if active is not None else None,
+        'current': registry.current() if registry is not None else None,
+        'versions': registry.versions() if registry is not None else [],
+        'swaps': list(swap_history),
+    })
+
+@app.route('/rollback', methods=['POST'])
+def rollback():
+    """
+    Point the registry at {"version": ...}, by default the one published
+    before the version being served, and swap to it. This worker swaps
+    right away; the others follow on their next registry poll. Requires
+    ADMIN_TOKEN to be set and sent as the X-Admin-Token header.
+    """
+    denied = forbidden()
+    if denied:
+        return denied
+    if registry is None:
+        return jsonify({'error': 'rollback needs REGISTRY_DIR'}), 404
+    try:
+        version = (request.get_json(silent=True) or {}).get('version') or registry.previous(active.version)
+        registry.metadata(version)
+    except RegistryError as e:
+        return jsonify({'error': str(e)}), 404
+    try:
+        registry.set_current(version)
+        # None if the registry watcher got there first
+        record = swap_model(version) or swap_history[-1]
+    except (OSError, ValueError, KeyError, BundleIntegrityError, RegistryError) as e:
+        return jsonify({'error': f'rollback failed: {e}'}), 500
+    return jsonify(dict(record, rolled_back=True))
+
+@app.route('/metrics')
+def prometheus_metrics():
+    gauges = {}
+    if prediction_cache is not None:
+        stats = prediction_cache.stats()
+        gauges['chatbot_cache_hits'] = ('Prediction cache hits in this worker', stats['hits'])
+        gauges['chatbot_cache_misses'] = ('Prediction cache misses in this worker', stats['misses'])
+    if active is not None and active.batcher is not None:
+        stats = active.batcher.stats()
+        gauges['chatbot_batch_queue_depth'] = ('Pending rows in this worker\'s batch queue', stats['queue_depth'])
+        gauges['chatbot_batch_mean_size'] = ('Mean micro-batch size in this worker', stats['mean_batch_size'])
+    if swap_history:
+        last = swap_history[-1]
+        gauges['chatbot_model_swap_seconds'] = ('Load, warm and activate time of this worker\'s last model swap',
+                                                (last['load_ms'] + last['warm_ms'] + last['activate_ms']) / 1000.0)
+    if transcripts is not None:
+        stats = transcripts.stats()
+        gauges['chatbot_transcripts_dropped'] = ('Transcript records dropped by this worker', stats['dropped'])
+        gauges['chatbot_transcripts_queue_depth'] = ('Transcript records waiting in this worker',
+                                                     stats['queue_depth'])
+    return metrics.render(gauges), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+@app.route('/debug/slow_requests')
+def slow_requests():
+    """
+    Folded stacks of this worker's slowest requests, ready for flamegraph.pl
+    """
+    if metrics.profiler is None:
+        return 'Set PROFILE_SLOWEST=N to enable the slow-request profiler\n', 404, {'Content-Type': 'text/plain'}
+    return metrics.profiler.dump(), 200, {'Content-Type': 'text/plain'}
+
+@app.route('/cache_stats')
+def cache_stats():
+    if prediction_cache is None:
+        return jsonify({'enabled': False})
+    return jsonify(dict(prediction_cache.stats(), enabled=True))
+
+@app.route('/session_stats')
+def session_stats():
+    return jsonify(session_store.stats())
+
+@app.route('/transcript_stats')
+def transcript_stats():
+    if transcripts is None:
+        return jsonify({'enabled': False})
+    return jsonify(dict(transcripts.stats(), enabled=True))
+
+@app.route('/batch_stats')
+def batch_stats():
+    batcher = active.batcher if active is not None else None
+    if batcher is None:
+        return jsonify({'enabled': False})
+    return jsonify(dict(batcher.stats(), enabled=True))
 
 # Advanced transformer-based response (uncomment if using)
-# @app.route('/get_advanced_response', methods=['POST'])
-# def get_advanced_response():
-#     user_message = request.json['message']
-#     
-#     # Check for crisis indicators first
-#     if check_for_crisis(user_message):
-#         return jsonify({'response': safety_responses["crisis"]})
-#     
-#     # Generate response using transformer model
-#     prompt = f"As a supportive mental health chatbot, respond to: {user_message}"
-#     response = text_generator(prompt, max_length=100, num_return_sequences=1)
-#     
-#     return jsonify({'response': response[0]['generated_text']})
+@app.route('/get_advanced_response', methods=['POST'])
+def get_advanced_response():
+    """
+    Generated reply from the pooled seq2seq service, falling back to the
+    intent response when generation is off, overloaded or over budget
+    """
+    data = request.json
+    user_message = data['message']
+    
+    # Check for crisis indicators first
+    crisis = check_for_crisis(user_message)
+    if crisis:
+        return jsonify({'response': safety_responses[crisis.severity]})
+    
+    response = generation_service.generate(user_message) if generation_service is not None else None
+    if response is None:
+        metrics.count('generation_fallback')
+        state = active
+        response = get_response(predict_class(user_message, state), state.response_table, data.get('session_id'))
+    return jsonify({'response': response})
+
+@app.route('/generation_stats')
+def generation_stats():
+    if generation_service is None:
+        return jsonify({'enabled': False})
+    return jsonify(dict(generation_service.stats(), enabled=True))
+
+# Warm-up runs at import by default and raises on missing artifacts, so a
+# broken deployment fails loudly. WARMUP=background serves /ready (and 503s)
+# while artifacts load in a thread.
+if os.environ.get('WARMUP', 'eager') == 'background':
+    threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
+else:
+    warm_up()
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
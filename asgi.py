@@ -0,0 +1,204 @@
+"""
+Async (ASGI) entry point serving the same routes as app.py.
+
+Model calls run on a bounded thread pool so the event loop never blocks, and
+/get_advanced_response/stream sends generated tokens to the client as
+server-sent events as soon as they are produced. Every other route is handed
+to the Flask app through asgiref's WSGI adapter.
+
+Run with:
+    uvicorn asgi:application --workers 2
+Set GENERATION_BACKEND=stub (offline stand-in), tiny or transformer to enable
+the generation routes; without it they answer 503.
+"""
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.wsgi import WsgiToAsgi
+
+import app as chatbot
+from utils.generation import PROMPT_PREFIX
+from utils.streaming import StreamStats, stream_in_executor
+
+GENERATION_WORKERS = int(os.environ.get('GENERATION_WORKERS', '2'))
+INTENT_WORKERS = int(os.environ.get('INTENT_WORKERS', '4'))
+
+# Separate pools so slow generations can't starve intent classification
+intent_executor = ThreadPoolExecutor(max_workers=INTENT_WORKERS, thread_name_prefix='intent')
+generation_executor = ThreadPoolExecutor(max_workers=GENERATION_WORKERS, thread_name_prefix='generate')
+
+wsgi_app = WsgiToAsgi(chatbot.app)
+generator = None
+
+
+def load_generator():
+    # Shares the app's generation service, so the process loads one model
+    # for both the batched and the streaming routes
+    # With GENERATION_BACKEND unset the generation routes answer 503 and
+    # /get_response is served as usual
+    global generator
+    if not chatbot.GENERATION_BACKEND:
+        return
+    generator = chatbot.load_generation_service().model
+    print(f"Generation backend '{chatbot.GENERATION_BACKEND}' loaded")
+
+
+def build_prompt(message):
+    return PROMPT_PREFIX + message
+
+
+async def read_json(receive):
+    body = b''
+    more = True
+    while more:
+        message = await receive()
+        body += message.get('body', b'')
+        more = message.get('more_body', False)
+    return json.loads(body or b'{}')
+
+
+async def send_json(send, payload, status=200):
+    body = json.dumps(payload).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'),
+                    (b'content-length', str(len(body)).encode())],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def sse_event(data, event=None):
+    payload = f"data: {json.dumps(data)}\n\n"
+    if event:
+        payload = f"event: {event}\n" + payload
+    return payload.encode('utf-8')
+
+
+def classify(message, session_id=None):
+    crisis = chatbot.check_for_crisis(message)
+    if crisis:
+        if session_id is not None:
+            chatbot.session_store.record(session_id, 'crisis', 1.0)
+        return chatbot.safety_responses[crisis.severity]
+    # One model version for the whole request, even if a swap lands mid-way
+    state = chatbot.active
+    ints = chatbot.predict_class(message, state)
+    return chatbot.get_response(ints, state.response_table, session_id)
+
+
+def respond(data, started):
+    # Same pipeline, counters and transcript as the Flask route
+    with chatbot.metrics.request():
+        return chatbot.respond(data, started)
+
+
+async def get_response(scope, receive, send):
+    started = time.perf_counter()
+    data = await read_json(receive)
+    loop = asyncio.get_running_loop()
+    response = await loop.run_in_executor(intent_executor, respond, data, started)
+    await send_json(send, {'response': response})
+
+
+async def get_advanced_response(scope, receive, send):
+    data = await read_json(receive)
+    message = data['message']
+
+    # Check for crisis indicators first
+    crisis = chatbot.check_for_crisis(message)
+    if crisis:
+        await send_json(send, {'response': chatbot.safety_responses[crisis.severity]})
+        return
+
+    # Batched with other requests by the generation service; None means
+    # overloaded or over budget, so answer from the intent model
+    response = await asyncio.wrap_future(chatbot.generation_service.submit(message))
+    generated = response is not None
+    if not generated:
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(intent_executor, classify, message, data.get('session_id'))
+    await send_json(send, {'response': response, 'generated': generated})
+
+
+async def stream_advanced_response(scope, receive, send):
+    data = await read_json(receive)
+    message = data['message']
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(b'content-type', b'text/event-stream'),
+                    (b'cache-control', b'no-cache'),
+                    (b'x-accel-buffering', b'no')],
+    })
+
+    # Check for crisis indicators first; the safety response is sent whole
+    crisis = chatbot.check_for_crisis(message)
+    if crisis:
+        await send({'type': 'http.response.body',
+                    'body': sse_event({'token': chatbot.safety_responses[crisis.severity]}),
+                    'more_body': True})
+        await send({'type': 'http.response.body', 'body': sse_event({'crisis': True}, event='done')})
+        return
+
+    stats = StreamStats()
+    try:
+        async for token in stream_in_executor(
+                lambda: generator.stream(build_prompt(message), chatbot.MAX_NEW_TOKENS), generation_executor):
+            stats.on_token()
+            await send({'type': 'http.response.body', 'body': sse_event({'token': token}), 'more_body': True})
+    except Exception as e:
+        print(f"Error during generation: {e}")
+        await send({'type': 'http.response.body', 'body': sse_event({'error': 'generation failed'}, event='error'),
+                    'more_body': True})
+    stats.finish()
+    await send({'type': 'http.response.body', 'body': sse_event(stats.as_dict(), event='done')})
+
+
+ROUTES = {
+    ('POST', '/get_response'): get_response,
+    ('POST', '/get_advanced_response'): get_advanced_response,
+    ('POST', '/get_advanced_response/stream'): stream_advanced_response,
+}
+
+
+async def lifespan(scope, receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            try:
+                await asyncio.get_running_loop().run_in_executor(generation_executor, load_generator)
+            except Exception as e:
+                await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                return
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            intent_executor.shutdown(wait=False)
+            generation_executor.shutdown(wait=True)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(scope, receive, send)
+        return
+    if scope['type'] == 'http':
+        handler = ROUTES.get((scope['method'], scope['path']))
+        if handler is not None:
+            # Like the Flask MODEL_ENDPOINTS: the generation routes fall back
+            # to the intent model, so they wait for warm-up too
+            if not chatbot.startup.ready:
+                await send_json(send, {'error': 'The chatbot is still starting up, please try again shortly.'},
+                                status=503)
+                return
+            if handler is not get_response and generator is None:
+                await send_json(send, {'error': 'generation backend not loaded'}, status=503)
+                return
+            await handler(scope, receive, send)
+            return
+    await wsgi_app(scope, receive, send)
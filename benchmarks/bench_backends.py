@@ -0,0 +1,97 @@
+"""
+Compare the Keras and NumPy intent-model backends.
+
+Reports per-request latency, cold-start time (fresh interpreter, import plus
+model load) and peak worker memory, and checks that both backends give the
+same probabilities within float tolerance.
+
+Usage: python benchmarks/bench_backends.py [--requests 2000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER = r'''
+import json, resource, sys, time
+t0 = time.perf_counter()
+backend = sys.argv[1]
+n_requests = int(sys.argv[2])
+sys.path.insert(0, sys.argv[3])
+import numpy as np
+if backend == 'numpy':
+    from utils.numpy_model import NumpyIntentModel
+    model = NumpyIntentModel('models/mental_health_chatbot_weights.npz')
+    dim = model.input_dim
+else:
+    from tensorflow.keras.models import load_model
+    model = load_model('models/mental_health_chatbot_model.h5')
+    dim = model.input_shape[1]
+cold_start = time.perf_counter() - t0
+
+rng = np.random.default_rng(0)
+x = (rng.random((n_requests, dim)) < 0.02).astype(np.float32)
+model.predict(x[:1], verbose=0)
+
+latencies = []
+for i in range(n_requests):
+    s = time.perf_counter()
+    model.predict(x[i:i + 1], verbose=0)
+    latencies.append(time.perf_counter() - s)
+latencies.sort()
+
+probs = model.predict(x[:256], verbose=0)
+np.save(sys.argv[4], np.asarray(probs, dtype=np.float32))
+
+print(json.dumps({
+    'backend': backend,
+    'cold_start_s': cold_start,
+    'p50_ms': 1000 * latencies[len(latencies) // 2],
+    'p99_ms': 1000 * latencies[int(len(latencies) * 0.99)],
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+}))
+'''
+
+
+def run_backend(backend, n_requests, probs_path):
+    out = subprocess.run(
+        [sys.executable, '-c', WORKER, backend, str(n_requests), ROOT, probs_path],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if out.returncode != 0:
+        print(f"{backend}: failed\n{out.stderr.strip().splitlines()[-1]}")
+        return None
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    import numpy as np
+    import tempfile
+
+    tmp = tempfile.mkdtemp()
+    results = {}
+    for backend in ('keras', 'numpy'):
+        results[backend] = run_backend(backend, args.requests, os.path.join(tmp, f'{backend}.npy'))
+
+    print(f"{'backend':<8} {'cold start':>11} {'p50':>9} {'p99':>9} {'max RSS':>10}")
+    for backend, r in results.items():
+        if r:
+            print(f"{backend:<8} {r['cold_start_s']:>10.2f}s {r['p50_ms']:>7.3f}ms "
+                  f"{r['p99_ms']:>7.3f}ms {r['max_rss_mb']:>8.1f}MB")
+
+    if all(results.values()):
+        a = np.load(os.path.join(tmp, 'keras.npy'))
+        b = np.load(os.path.join(tmp, 'numpy.npy'))
+        print(f"max |keras - numpy| = {np.abs(a - b).max():.2e}, "
+              f"allclose(atol=1e-5): {np.allclose(a, b, atol=1e-5)}")
+
+
+if __name__ == '__main__':
+    main()
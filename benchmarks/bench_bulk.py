@@ -0,0 +1,48 @@
+"""
+Bulk-scoring throughput of classify_messages.py as the number of
+tokenization worker processes grows.
+
+Usage: python benchmarks/bench_bulk.py [--messages 50000] [--max-workers N]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from benchmarks.load_test import message_stream
+from classify_messages import classify_stream
+
+
+class _Discard:
+    def write(self, _):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--messages', type=int, default=50000)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=1024)
+    args = parser.parse_args()
+
+    lines = [json.dumps({'id': i, 'message': m}) for i, m in enumerate(message_stream(args.messages))]
+
+    workers = 1
+    baseline = None
+    print(f"{'workers':>8} {'messages/sec':>14} {'speedup':>8}")
+    while workers <= args.max_workers:
+        start = time.perf_counter()
+        classify_stream(lines, _Discard(), workers, args.chunk_size)
+        rate = args.messages / (time.perf_counter() - start)
+        baseline = baseline or rate
+        print(f"{workers:>8} {rate:>14,.0f} {rate / baseline:>7.2f}x")
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main()
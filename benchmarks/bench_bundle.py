@@ -0,0 +1,123 @@
+"""
+Per-worker memory and fork-to-first-request time: separate artifact files
+(words.pkl, classes.pkl, intents JSON, .npz weights) versus the memory-mapped
+artifact bundle.
+
+Forks N workers the way gunicorn does. Each loads the artifacts, serves one
+prediction, then reports its RSS and PSS (proportional set size, which splits
+shared pages between the processes that map them) from
+/proc/self/smaps_rollup. Synthetic artifacts are used so the vocabulary size
+can be scaled up.
+
+Usage: python benchmarks/bench_bundle.py [--workers 4] [--vocab 50000] [--classes 500]
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.artifact_bundle import ArtifactBundle, write_bundle
+from utils.numpy_model import NumpyIntentModel
+from utils.preprocessor import build_word_index
+
+
+def make_artifacts(directory, vocab, n_classes):
+    rng = np.random.default_rng(0)
+    words = [f'word{i}' for i in range(vocab)]
+    classes = [f'intent_{i}' for i in range(n_classes)]
+    intents = {'intents': [{'tag': c, 'patterns': [], 'responses': [f'{c} response {j}' for j in range(4)]}
+                           for c in classes]}
+    layers = [
+        (rng.standard_normal((vocab, 128), dtype=np.float32), np.zeros(128, np.float32)),
+        (rng.standard_normal((128, 64), dtype=np.float32), np.zeros(64, np.float32)),
+        (rng.standard_normal((64, n_classes), dtype=np.float32), np.zeros(n_classes, np.float32)),
+    ]
+    pickle.dump(words, open(os.path.join(directory, 'words.pkl'), 'wb'))
+    pickle.dump(classes, open(os.path.join(directory, 'classes.pkl'), 'wb'))
+    with open(os.path.join(directory, 'intents.json'), 'w') as f:
+        json.dump(intents, f)
+    np.savez(os.path.join(directory, 'weights.npz'),
+             **{f'{k}{i}': a for i, (W, b) in enumerate(layers) for k, a in (('W', W), ('b', b))})
+    write_bundle(os.path.join(directory, 'bundle.bin'), words, classes, intents, layers)
+
+
+def memory_kb():
+    usage = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ('Rss:', 'Pss:'):
+                usage[parts[0][:-1].lower()] = int(parts[1])
+    return usage
+
+
+def worker(mode, directory, forked_at, barrier, results):
+    if mode == 'files':
+        words = pickle.load(open(os.path.join(directory, 'words.pkl'), 'rb'))
+        classes = pickle.load(open(os.path.join(directory, 'classes.pkl'), 'rb'))
+        with open(os.path.join(directory, 'intents.json')) as f:
+            json.load(f)
+        model = NumpyIntentModel(os.path.join(directory, 'weights.npz'))
+    else:
+        bundle = ArtifactBundle(os.path.join(directory, 'bundle.bin'))
+        words, classes = bundle.words, bundle.classes
+        model = NumpyIntentModel(layers=bundle.layers)
+    word_index = build_word_index(words)
+    # Touch every weight page, as traffic eventually does
+    model.predict(np.ones((1, len(words)), dtype=np.float32))
+    ready = time.time() - forked_at.value
+    columns = np.array([word_index['word1'], word_index['word2']])
+    model.predict_sparse([columns])
+
+    # Measure once every worker is loaded, so shared pages are split
+    barrier.wait()
+    results.put({'ready_s': ready, **memory_kb()})
+    barrier.wait()
+
+
+def run(mode, directory, n_workers):
+    ctx = mp.get_context('fork')
+    barrier = ctx.Barrier(n_workers)
+    results = ctx.Queue()
+    forked_at = ctx.Value('d', time.time())
+    procs = [ctx.Process(target=worker, args=(mode, directory, forked_at, barrier, results))
+             for _ in range(n_workers)]
+    for p in procs:
+        p.start()
+    out = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--vocab', type=int, default=50000)
+    parser.add_argument('--classes', type=int, default=500)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    make_artifacts(directory, args.vocab, args.classes)
+
+    print(f"{args.workers} workers, vocab {args.vocab}, {args.classes} classes")
+    print(f"{'mode':<8} {'fork->ready':>12} {'RSS/worker':>12} {'PSS/worker':>12} {'PSS total':>11}")
+    for mode in ('files', 'bundle'):
+        out = run(mode, directory, args.workers)
+        ready = max(r['ready_s'] for r in out)
+        rss = sum(r['rss'] for r in out) / len(out) / 1024
+        pss = sum(r['pss'] for r in out) / 1024
+        print(f"{mode:<8} {1000 * ready:>10.1f}ms {rss:>10.1f}MB {pss / len(out):>10.1f}MB {pss:>9.1f}MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Throughput of the crisis keyword scanner versus the original per-keyword loop.
+
+The lexicon is padded with synthetic phrases to show how both approaches scale
+as the clinical team grows it to several hundred entries.
+
+Usage: python benchmarks/bench_crisis.py [--phrases 500] [--messages 20000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.crisis import CrisisDetector, load_lexicon
+
+MESSAGES = [
+    "Hi there, how are you today?",
+    "I've been feeling really stressed about work and can't sleep at night.",
+    "I started a new diet and some yoga classes this week, any tips for staying motivated?",
+    "Sometimes I feel like nobody understands me and I don't know who to talk to about it.",
+    "I want to end my life",
+    "Thanks, that breathing exercise really helped.",
+]
+
+
+def legacy_check(keywords, message):
+    message_lower = message.lower()
+    for keyword in keywords:
+        if keyword in message_lower:
+            return True
+    return False
+
+
+def synthetic_lexicon(base_path, n_phrases):
+    lexicon = {}
+    for phrase, severity in load_lexicon(base_path):
+        lexicon.setdefault(severity, []).append(phrase)
+    rng = random.Random(0)
+    alphabet = 'abcdefghijklmnopqrstuvwxyz'
+    while sum(len(v) for v in lexicon.values()) < n_phrases:
+        words = [''.join(rng.choice(alphabet) for _ in range(rng.randint(4, 9)))
+                 for _ in range(rng.randint(1, 3))]
+        lexicon['crisis'].append(' '.join(words))
+    return lexicon
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--phrases', type=int, default=500)
+    parser.add_argument('--messages', type=int, default=20000)
+    args = parser.parse_args()
+
+    lexicon = synthetic_lexicon(os.path.join(ROOT, 'data', 'crisis_lexicon.json'), args.phrases)
+    path = os.path.join(tempfile.mkdtemp(), 'lexicon.json')
+    with open(path, 'w') as f:
+        json.dump(lexicon, f)
+    keywords = [p for phrases in lexicon.values() for p in phrases]
+
+    start = time.perf_counter()
+    detector = CrisisDetector(path, reload_interval=0)
+    compile_time = time.perf_counter() - start
+
+    messages = [MESSAGES[i % len(MESSAGES)] for i in range(args.messages)]
+
+    start = time.perf_counter()
+    for m in messages:
+        legacy_check(keywords, m)
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for m in messages:
+        detector.detect(m)
+    automaton = time.perf_counter() - start
+
+    print(f"lexicon: {len(keywords)} phrases, compiled in {1000 * compile_time:.1f}ms")
+    print(f"legacy loop:  {args.messages / legacy:>12,.0f} messages/sec")
+    print(f"automaton:    {args.messages / automaton:>12,.0f} messages/sec")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Throughput and latency of the pooled generation service (utils/generation.py)
+against one unbatched, uncached generation per request.
+
+Uses a randomly initialized tiny T5 with the byte-level ByT5 tokenizer
+(--backend tiny, needs torch and transformers but no download) or the
+offline stub generator (--backend stub). A share of the messages repeat, as
+greetings and common complaints do, to show the reply cache.
+
+Usage: python benchmarks/bench_generation.py [--backend tiny] [--clients 16] [--requests 200]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.load_test import message_stream, percentiles
+from utils.generation import GenerationService, load_generation_model
+
+
+def run(service, messages, clients):
+    latencies = []
+    fallbacks = 0
+
+    def one(message):
+        started = time.perf_counter()
+        reply = service.generate(message)
+        return time.perf_counter() - started, reply is None
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        for latency, fell_back in pool.map(one, messages):
+            latencies.append(latency)
+            fallbacks += fell_back
+    return len(messages) / (time.perf_counter() - started), latencies, fallbacks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--backend', default='tiny', choices=['tiny', 'stub'])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--repeat-share', type=float, default=0.3,
+                        help="fraction of requests that repeat an earlier message")
+    parser.add_argument('--max-new-tokens', type=int, default=32)
+    parser.add_argument('--time-budget', type=float, default=5.0)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    unique = list(message_stream(args.requests))
+    messages = [rng.choice(unique[:20]) if rng.random() < args.repeat_share else unique[i]
+                for i in range(args.requests)]
+
+    model = load_generation_model(args.backend)
+    configs = [
+        ('unbatched, no cache', dict(workers=args.clients, max_batch_size=1, window_ms=0, cache_size=0)),
+        ('pooled, batched', dict(workers=2, max_batch_size=16, window_ms=10, cache_size=0)),
+        ('pooled, batched, cached', dict(workers=2, max_batch_size=16, window_ms=10, cache_size=1024)),
+    ]
+    print(f"backend {args.backend}, {args.clients} clients, {args.requests} requests")
+    for name, config in configs:
+        service = GenerationService(model, max_new_tokens=args.max_new_tokens, time_budget=args.time_budget,
+                                    max_queue=4 * args.clients, **config)
+        throughput, latencies, fallbacks = run(service, messages, args.clients)
+        p = percentiles(latencies)
+        stats = service.stats()
+        print(f"{name:<24} {throughput:7.1f} replies/s  p50 {p['p50_ms']:7.1f}ms  p99 {p['p99_ms']:7.1f}ms  "
+              f"mean batch {stats['mean_batch_size']:4.1f}  cache hits {stats['cache_hits']:>3}  "
+              f"fallbacks {fallbacks}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""
+Zero-downtime model swaps: request latency before, during and after the app
+picks up a newly published registry version, plus the swap's own load, warm
+and activate times and a rollback through /rollback.
+
+Uses synthetic bundles (random weights over the corpus vocabulary, padded
+to --vocab) and TEXT_PREPROCESSOR=frozen, so it needs no trained model,
+TensorFlow or NLTK data.
+
+Usage: python benchmarks/bench_hot_swap.py [--vocab 20000] [--hidden 512] [--threads 8] [--seconds 3]
+"""
+import argparse
+import json
+import os
+import pickle
+import re
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.artifact_bundle import write_bundle
+from utils.registry import ArtifactRegistry
+
+TOKEN = re.compile(r"[a-z']+")
+
+
+def corpus():
+    with open(os.path.join(ROOT, 'data', 'mental_health_intents.json')) as f:
+        intents = json.load(f)
+    messages = [p for intent in intents['intents'] for p in intent['patterns']]
+    return intents, messages
+
+
+def synthetic_version(intents, vocab, hidden, seed):
+    """
+    Files for one registry version: a bundle with random weights over the
+    corpus vocabulary and an identity lemma table
+    """
+    rng = np.random.default_rng(seed)
+    patterns = [p for intent in intents['intents'] for p in intent['patterns']]
+    words = sorted({t for p in patterns for t in TOKEN.findall(p.lower())})
+    words += [f'pad{i}' for i in range(max(0, vocab - len(words)))]
+    classes = [intent['tag'] for intent in intents['intents']]
+    sizes = [len(words), hidden, hidden // 2, len(classes)]
+    layers = [(rng.standard_normal((m, n)).astype(np.float32) * 0.1, np.zeros(n, dtype=np.float32))
+              for m, n in zip(sizes, sizes[1:])]
+    directory = tempfile.mkdtemp()
+    files = {'chatbot_bundle.bin': os.path.join(directory, 'chatbot_bundle.bin'),
+             'lemmas.pkl': os.path.join(directory, 'lemmas.pkl')}
+    write_bundle(files['chatbot_bundle.bin'], words, classes, intents, layers, version=f'synthetic{seed}')
+    with open(files['lemmas.pkl'], 'wb') as f:
+        pickle.dump({w: w for w in words}, f)
+    return files
+
+
+class Load:
+    """
+    Closed-loop clients posting to /get_response, recording each request's
+    (start, end, status)
+    """
+
+    def __init__(self, client, messages, threads):
+        self.client = client
+        self.messages = messages
+        self.samples = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = [threading.Thread(target=self._run, args=(i,), daemon=True) for i in range(threads)]
+
+    def _run(self, offset):
+        i = offset
+        while not self._stop.is_set():
+            message = self.messages[i % len(self.messages)]
+            started = time.perf_counter()
+            status = self.client.post('/get_response', json={'message': message}).status_code
+            ended = time.perf_counter()
+            with self._lock:
+                self.samples.append((started, ended, status))
+            i += len(self._threads)
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+
+    def window(self, start, end):
+        """
+        Latencies (ms) and error count of requests overlapping [start, end)
+        """
+        picked = [s for s in self.samples if s[1] >= start and s[0] < end]
+        return [1000.0 * (e - s) for s, e, _ in picked], sum(1 for *_, status in picked if status != 200)
+
+
+def report(label, latencies, errors):
+    if not latencies:
+        print(f"{label:<24} no requests")
+        return
+    latencies = np.array(latencies)
+    print(f"{label:<24} {len(latencies):6d} requests  p50 {np.percentile(latencies, 50):7.2f}ms  "
+          f"p99 {np.percentile(latencies, 99):7.2f}ms  max {latencies.max():7.2f}ms  errors {errors}")
+
+
+def wait_for_version(chatbot, version, timeout=60.0):
+    deadline = time.perf_counter() + timeout
+    while chatbot.active.version != version:
+        if time.perf_counter() > deadline:
+            raise RuntimeError(f"the app did not swap to {version}")
+        time.sleep(0.001)
+    return time.perf_counter()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--vocab', type=int, default=20000)
+    parser.add_argument('--hidden', type=int, default=512)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--poll', type=float, default=0.05)
+    args = parser.parse_args()
+
+    intents, messages = corpus()
+    registry_dir = tempfile.mkdtemp()
+    registry = ArtifactRegistry(registry_dir)
+    first = registry.publish(synthetic_version(intents, args.vocab, args.hidden, 1), 'synthetic1')
+    files = synthetic_version(intents, args.vocab, args.hidden, 2)
+
+    os.environ.update(MODEL_BACKEND='bundle', REGISTRY_DIR=registry_dir, REGISTRY_POLL=str(args.poll),
+                      TEXT_PREPROCESSOR='frozen', PREDICTION_CACHE_SIZE='0', WARMUP='eager',
+                      ADMIN_TOKEN='bench-hot-swap')
+    os.chdir(ROOT)
+    import app as chatbot
+    client = chatbot.app.test_client()
+    print(f"serving {chatbot.active.version}: {args.vocab} words, hidden {args.hidden}, "
+          f"{args.threads} client threads")
+
+    load = Load(client, messages, args.threads)
+    load.start()
+    time.sleep(args.seconds)
+
+    # New version published mid-traffic; the watcher loads, warms and swaps it
+    published = time.perf_counter()
+    second = registry.publish(files, 'synthetic2')
+    swapped = wait_for_version(chatbot, second)
+    time.sleep(args.seconds)
+
+    # Rollback through the admin endpoint
+    rollback_started = time.perf_counter()
+    response = client.post('/rollback', json={}, headers={'X-Admin-Token': os.environ['ADMIN_TOKEN']})
+    rolled_back = time.perf_counter()
+    time.sleep(args.seconds)
+    load.stop()
+
+    if response.status_code != 200 or response.json['to'] != first:
+        raise RuntimeError(f"rollback failed: {response.status_code} {response.get_data(as_text=True)}")
+
+    report('before swap', *load.window(load.samples[0][0], published))
+    report('publish -> swapped', *load.window(published, swapped))
+    report('after swap', *load.window(swapped, rollback_started))
+    report('during rollback', *load.window(rollback_started, rolled_back))
+    report('after rollback', *load.window(rolled_back, float('inf')))
+
+    print(f"\npublish to serving: {1000 * (swapped - published):.1f}ms (poll interval {1000 * args.poll:.0f}ms)")
+    for swap in chatbot.swap_history:
+        print(f"swap {swap['from']} -> {swap['to']}: load {swap['load_ms']:.1f}ms  warm {swap['warm_ms']:.1f}ms  "
+              f"activate {swap['activate_ms']:.3f}ms")
+    print(f"versions kept for rollback: {[m['version'] for m in registry.versions()]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Tokens/sec of clean_up_sentence with NLTK versus the compiled text engine in
+utils/text_engine.py, and an exact-match check of both engine modes against
+train_model.py's lemmatization on the training corpus.
+
+Needs the NLTK punkt and wordnet data, which the reference path uses.
+
+Usage: python benchmarks/bench_preprocessor.py [--corpus data/mental_health_intents.json] [--repeat 50]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import nltk
+from nltk.stem import WordNetLemmatizer
+
+from utils.corpus import iter_patterns
+from utils.dataset import MemoizedPreprocessor, build_vocabulary
+from utils.text_engine import LemmaTable, TextPreprocessor
+
+# Messages that are not in the corpus, to exercise the memo and fallback paths
+UNSEEN = [
+    "My therapists said the panic attacks would pass.",
+    "I can't stop worrying about my exams -- they're next week!",
+    "Dr. Smith suggested journaling. Does that help?",
+    "\"I'm fine,\" I keep telling my friends (but I'm not).",
+]
+
+
+def reference(lemmatize, sentence):
+    return [lemmatize(word.lower()) for word in nltk.word_tokenize(sentence)]
+
+
+def time_tokens(clean, sentences, repeat):
+    tokens = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for sentence in sentences:
+            tokens += len(clean(sentence))
+    return tokens / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--corpus', nargs='*', default=[os.path.join(ROOT, 'data', 'mental_health_intents.json')])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    lemmatize = WordNetLemmatizer().lemmatize
+    patterns = [pattern for pattern, _ in iter_patterns(args.corpus)]
+
+    # Same vocabulary pass as train_model.py
+    preprocessor = MemoizedPreprocessor(nltk.word_tokenize, lemmatize)
+    words, _, _ = build_vocabulary(iter_patterns(args.corpus), preprocessor, keep_documents=False)
+
+    compiled_lemmas = LemmaTable(preprocessor.lemma_table(), lemmatize)
+    compiled_lemmas.seed(words)
+    compiled = TextPreprocessor(compiled_lemmas)
+    frozen_lemmas = LemmaTable(preprocessor.lemma_table())
+    frozen_lemmas.seed(words)
+    frozen = TextPreprocessor(frozen_lemmas)
+
+    failed = False
+    for name, engine, sentences in (('compiled', compiled, patterns + UNSEEN), ('frozen', frozen, patterns)):
+        mismatches = [s for s in sentences if engine.clean_up_sentence(s) != reference(lemmatize, s)]
+        print(f"{name}: {len(sentences) - len(mismatches)}/{len(sentences)} sentences match NLTK")
+        for sentence in mismatches[:5]:
+            print(f"  {sentence!r}: {engine.clean_up_sentence(sentence)} != {reference(lemmatize, sentence)}")
+        failed = failed or bool(mismatches)
+
+    sentences = patterns + UNSEEN
+    nltk_rate = time_tokens(lambda s: reference(lemmatize, s), sentences, args.repeat)
+    compiled_rate = time_tokens(compiled.clean_up_sentence, sentences, args.repeat)
+    frozen_rate = time_tokens(frozen.clean_up_sentence, sentences, args.repeat)
+    print(f"nltk:      {nltk_rate:>12,.0f} tokens/sec")
+    print(f"compiled:  {compiled_rate:>12,.0f} tokens/sec ({compiled_rate / nltk_rate:.1f}x)")
+    print(f"frozen:    {frozen_rate:>12,.0f} tokens/sec ({frozen_rate / nltk_rate:.1f}x)")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Response lookup cost as the number of intents grows: the original linear scan
+over intents_json['intents'] versus the precompiled ResponseTable.
+
+Usage: python benchmarks/bench_responses.py [--lookups 20000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.responses import ResponseTable
+
+
+def linear_lookup(tag, intents_json):
+    for i in intents_json['intents']:
+        if i['tag'] == tag:
+            import random
+            return random.choice(i['responses'])
+    return None
+
+
+def synthetic_intents(n):
+    return {'intents': [
+        {'tag': f'intent_{i}', 'patterns': [], 'responses': [f'response {i}.{j}' for j in range(4)]}
+        for i in range(n)
+    ]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lookups', type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'intents':>8} {'linear scan':>14} {'table':>12}")
+    for n in (35, 100, 1000, 5000):
+        intents_json = synthetic_intents(n)
+        table = ResponseTable(intents_json)
+        rng = random.Random(0)
+        tags = [f'intent_{rng.randrange(n)}' for _ in range(args.lookups)]
+
+        start = time.perf_counter()
+        for tag in tags:
+            linear_lookup(tag, intents_json)
+        linear = (time.perf_counter() - start) / args.lookups
+
+        start = time.perf_counter()
+        for tag in tags:
+            table.choose(tag)
+        compiled = (time.perf_counter() - start) / args.lookups
+
+        print(f"{n:>8} {1e6 * linear:>12.2f}us {1e6 * compiled:>10.2f}us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Accuracy and latency of the retrieval intent backend (utils/retrieval.py)
+versus the bag-of-words classifier.
+
+Accuracy is top-1 intent on data/intent_eval.jsonl, phrasings that are not
+in the training patterns; a message counts as a fallback when no intent
+clears the backend's threshold. Needs the trained artifacts in models/ and
+the NLTK data. --scale also times exact and approximate (IVF) search over a
+synthetic pattern set of that size.
+
+Usage: python benchmarks/bench_retrieval.py [--scale 200000]
+"""
+import argparse
+import json
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.numpy_model import NumpyIntentModel
+from utils.preprocessor import clean_up_sentence, lemmas_to_columns, load_word_index
+from utils.retrieval import PatternIndex
+
+ERROR_THRESHOLD = 0.25
+RETRIEVAL_THRESHOLD = 0.2
+
+
+def evaluate(name, predict, lemma_lists, tags, classes, threshold):
+    latencies = []
+    correct = fallback = 0
+    for lemmas, tag in zip(lemma_lists, tags):
+        start = time.perf_counter()
+        scores = predict(lemmas)
+        latencies.append(time.perf_counter() - start)
+        best = int(np.argmax(scores))
+        if scores[best] <= threshold:
+            fallback += 1
+        elif classes[best] == tag:
+            correct += 1
+    latencies.sort()
+    n = len(tags)
+    print(f"{name:<10} accuracy {100 * correct / n:5.1f}%  fallback {100 * fallback / n:5.1f}%  "
+          f"p50 {1000 * latencies[n // 2]:.3f}ms")
+
+
+def time_scale(index, n_patterns, queries, ann_lists):
+    rng = np.random.default_rng(0)
+    base = index.matrix
+    # Perturbed copies of the real patterns, re-normalized
+    matrix = base[rng.integers(len(base), size=n_patterns)] + rng.normal(0, 0.02, (n_patterns, base.shape[1]))
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    classes = index.pattern_classes[rng.integers(len(base), size=n_patterns)]
+    for lists in (0, ann_lists):
+        started = time.perf_counter()
+        big = PatternIndex(matrix, classes, index.classes, index.embedder, ann_lists=lists)
+        build = time.perf_counter() - started
+        started = time.perf_counter()
+        for lemmas in queries:
+            big.predict_lemmas([lemmas])
+        per_query = (time.perf_counter() - started) / len(queries)
+        label = f"IVF {lists} lists" if lists else "exact"
+        print(f"{n_patterns:,} patterns, {label:<14} build {build:6.2f}s  {1000 * per_query:.3f}ms/query")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--eval', default=os.path.join(ROOT, 'data', 'intent_eval.jsonl'))
+    parser.add_argument('--scale', type=int, default=0)
+    parser.add_argument('--ann-lists', type=int, default=256)
+    args = parser.parse_args()
+    os.chdir(ROOT)
+
+    with open(args.eval) as f:
+        examples = [json.loads(line) for line in f if line.strip()]
+    lemma_lists = [clean_up_sentence(e['message']) for e in examples]
+    tags = [e['tag'] for e in examples]
+
+    words = pickle.load(open('models/words.pkl', 'rb'))
+    classes = pickle.load(open('models/classes.pkl', 'rb'))
+    word_index = load_word_index('models/word_index.pkl', words)
+    mlp = NumpyIntentModel('models/mental_health_chatbot_weights.npz')
+    index = PatternIndex.load('models/pattern_index.npz')
+
+    print(f"{len(examples)} held-out messages, {len(index.matrix)} indexed patterns")
+    evaluate('classifier', lambda lemmas: mlp.predict_sparse([lemmas_to_columns(lemmas, word_index)])[0],
+             lemma_lists, tags, classes, ERROR_THRESHOLD)
+    evaluate('retrieval', lambda lemmas: index.predict_lemmas([lemmas])[0],
+             lemma_lists, tags, index.classes, RETRIEVAL_THRESHOLD)
+
+    if args.scale:
+        time_scale(index, args.scale, lemma_lists, args.ann_lists)
+
+
+if __name__ == '__main__':
+    main()
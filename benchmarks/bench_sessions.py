@@ -0,0 +1,78 @@
+"""
+Memory per 100k active sessions and per-request overhead of the session
+stores in utils/sessions.py.
+
+Each simulated request does what get_response does with a session_id: one
+get (distress streak and last response) and one record.
+
+Usage: python benchmarks/bench_sessions.py [--sessions 100000] [--requests 20000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.sessions import SessionStore, SQLiteSessionStore, session_sizeof
+
+TAGS = ['greeting', 'anxiety', 'depression', 'stress', 'sleep', None, 'grief', 'thanks']
+DISTRESS = frozenset(['anxiety', 'depression', 'grief'])
+RESPONSE = "I'm here to listen. Would you like to tell me more about how you've been feeling?"
+
+
+def request(store, session_id, tag):
+    state = store.get(session_id)
+    if state is not None:
+        state.distress
+        state.response_for(tag)
+    store.record(session_id, tag, 0.9, RESPONSE)
+
+
+def fill(store, n_sessions, turns, rng):
+    for i in range(n_sessions):
+        for _ in range(turns):
+            store.record(f"session-{i:08d}", rng.choice(TAGS), 0.9, RESPONSE)
+
+
+def overhead_us(store, n_sessions, n_requests, rng):
+    ids = [f"session-{rng.randrange(n_sessions):08d}" for _ in range(n_requests)]
+    tags = [rng.choice(TAGS) for _ in range(n_requests)]
+    start = time.perf_counter()
+    for session_id, tag in zip(ids, tags):
+        request(store, session_id, tag)
+    return 1e6 * (time.perf_counter() - start) / n_requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=100000)
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--turns', type=int, default=10, help="turns recorded per session before measuring")
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    memory = SessionStore(max_sessions=args.sessions, idle_timeout=None)
+    fill(memory, args.sessions, args.turns, rng)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    per_100k = used * 100000 / args.sessions
+    print(f"memory store: {per_100k / 2 ** 20:.1f}MB per 100k sessions "
+          f"({used / args.sessions:.0f} bytes/session, estimate {session_sizeof()})")
+    print(f"memory store: {overhead_us(memory, args.sessions, args.requests, rng):.2f}us per request")
+
+    path = os.path.join(tempfile.mkdtemp(), 'sessions.db')
+    sqlite = SQLiteSessionStore(path, max_sessions=args.sessions, idle_timeout=None)
+    fill(sqlite, args.sessions // 10, 1, rng)
+    print(f"sqlite store: {overhead_us(sqlite, args.sessions // 10, args.requests, rng):.2f}us per request "
+          f"({os.path.getsize(path) / 2 ** 20:.1f}MB file for {len(sqlite)} sessions)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Cold start of app.py per backend: wall time for a fresh interpreter to import
+the app and finish warm-up, with the app's own per-phase timings.
+
+Usage: python benchmarks/bench_startup.py [--backends keras,numpy,bundle] [--runs 3]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r'''
+import json
+import app
+print(json.dumps(app.startup.status()))
+'''
+
+
+def cold_start(backend):
+    env = dict(os.environ, MODEL_BACKEND=backend, WARMUP='eager')
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, '-c', CHILD], cwd=ROOT, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if out.returncode != 0:
+        return wall, {'state': 'failed', 'error': out.stderr.strip().splitlines()[-1]}
+    return wall, json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--backends', default='keras,numpy,bundle')
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    for backend in args.backends.split(','):
+        walls = []
+        status = None
+        for _ in range(args.runs):
+            wall, status = cold_start(backend)
+            walls.append(wall)
+            if status['state'] != 'ready':
+                break
+        if status['state'] != 'ready':
+            print(f"{backend:<8} failed: {status['error']}")
+            continue
+        print(f"{backend:<8} best {min(walls):.2f}s wall  phases (ms): {status['timings_ms']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Time-to-first-token and tokens/sec of the streaming endpoint in asgi.py.
+
+Drives the ASGI app in-process with the offline stub generator, so no model
+download or server is needed. Concurrent clients show how the bounded
+generation pool behaves under load.
+
+Usage: python benchmarks/bench_streaming.py [--clients 8] [--token-delay 0.01]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+# Don't require trained intent artifacts just to exercise generation
+os.environ.setdefault('WARMUP', 'background')
+
+import asgi
+from utils.streaming import StubSeq2Seq
+
+
+async def sse_request(message):
+    body = json.dumps({'message': message}).encode()
+    scope = {'type': 'http', 'method': 'POST', 'path': '/get_advanced_response/stream',
+             'headers': [(b'content-type', b'application/json')], 'query_string': b''}
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        await asyncio.sleep(3600)
+
+    started = time.perf_counter()
+    first_token = None
+    done = None
+
+    async def send(message):
+        nonlocal first_token, done
+        if message['type'] != 'http.response.body':
+            return
+        for event in message.get('body', b'').decode().split('\n\n'):
+            if not event:
+                continue
+            if event.startswith('event: done'):
+                done = json.loads(event.split('data: ', 1)[1])
+            elif first_token is None:
+                first_token = time.perf_counter()
+
+    await asgi.application(scope, receive, send)
+    return {'client_ttft_ms': 1000 * (first_token - started), 'server': done}
+
+
+async def run(clients):
+    started = time.perf_counter()
+    results = await asyncio.gather(*[
+        sse_request(f"I have been feeling anxious about exams, request {i}") for i in range(clients)
+    ])
+    wall = time.perf_counter() - started
+    return results, wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--token-delay', type=float, default=0.01)
+    args = parser.parse_args()
+
+    asgi.generator = StubSeq2Seq(token_delay=args.token_delay)
+    results, wall = asyncio.run(run(args.clients))
+
+    ttfts = sorted(r['client_ttft_ms'] for r in results)
+    rates = [r['server']['tokens_per_sec'] for r in results if r['server'].get('tokens_per_sec')]
+    tokens = sum(r['server']['tokens'] for r in results)
+    print(f"clients: {args.clients}, generation workers: {asgi.GENERATION_WORKERS}")
+    print(f"time to first token: min {ttfts[0]:.1f}ms, p50 {ttfts[len(ttfts) // 2]:.1f}ms, "
+          f"max {ttfts[-1]:.1f}ms")
+    print(f"per-stream tokens/sec: {sum(rates) / len(rates):.1f}")
+    print(f"aggregate tokens/sec: {tokens / wall:.1f}")
+
+
+if __name__ == '__main__':
+    main()
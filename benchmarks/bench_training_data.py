@@ -0,0 +1,113 @@
+"""
+Training-data preprocessing time: the original nested-loop builder versus the
+index-map builder in utils/dataset.py, for corpus sizes from 300 to 1M
+patterns.
+
+The legacy builder is only run up to --legacy-max patterns; beyond that it
+takes far longer than the model fit itself.
+
+Usage: python benchmarks/bench_training_data.py [--sizes 300,3000,30000,300000,1000000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.dataset import MemoizedPreprocessor, build_vocabulary, build_training_matrix
+
+
+def synthetic_corpus(n_patterns, vocab_size=5000, n_classes=500, seed=0):
+    rng = random.Random(seed)
+    vocab = [f"word{i}" for i in range(vocab_size)]
+    # Zipf-like word frequencies, as in real chat text
+    weights = [1.0 / (i + 1) for i in range(vocab_size)]
+    return [
+        (' '.join(rng.choices(vocab, weights, k=rng.randint(3, 12))) + ' ?', f"intent_{i % n_classes}")
+        for i in range(n_patterns)
+    ]
+
+
+def legacy_build(patterns, tokenize, lemmatize):
+    words, classes, documents = [], [], []
+    for pattern, tag in patterns:
+        word_list = tokenize(pattern)
+        words.extend(word_list)
+        documents.append((word_list, tag))
+        if tag not in classes:
+            classes.append(tag)
+    words = [lemmatize(w.lower()) for w in words if w not in ['?', '!', '.', ',']]
+    words = sorted(set(words))
+    classes = sorted(set(classes))
+
+    training = []
+    output_empty = [0] * len(classes)
+    for document in documents:
+        bag = []
+        word_patterns = [lemmatize(w.lower()) for w in document[0]]
+        for word in words:
+            bag.append(1 if word in word_patterns else 0)
+        output_row = list(output_empty)
+        output_row[classes.index(document[1])] = 1
+        training.append([bag, output_row])
+    random.shuffle(training)
+    training = np.array(training, dtype=object)
+    return np.array(list(training[:, 0])), np.array(list(training[:, 1]))
+
+
+def vectorized_build(patterns, tokenize, lemmatize, sparse):
+    preprocessor = MemoizedPreprocessor(tokenize, lemmatize)
+    words, classes, documents = build_vocabulary(patterns, preprocessor)
+    word_index = {w: i for i, w in enumerate(words)}
+    class_index = {c: i for i, c in enumerate(classes)}
+    return build_training_matrix(documents, word_index, class_index, dtype=np.uint8, sparse=sparse)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='300,3000,30000,300000,1000000')
+    parser.add_argument('--legacy-max', type=int, default=3000)
+    parser.add_argument('--dense-max', type=int, default=100000)
+    parser.add_argument('--tokenizer', choices=['split', 'nltk'], default='split',
+                        help="'nltk' needs the punkt and wordnet data")
+    args = parser.parse_args()
+
+    if args.tokenizer == 'nltk':
+        import nltk
+        from nltk.stem import WordNetLemmatizer
+        tokenize, lemmatize = nltk.word_tokenize, WordNetLemmatizer().lemmatize
+    else:
+        tokenize, lemmatize = str.split, lambda w: w.rstrip('s')
+
+    import scipy.sparse  # imported up front so it isn't timed
+
+    print(f"{'patterns':>9} {'legacy':>10} {'dense':>10} {'sparse':>10}")
+    for n in (int(s) for s in args.sizes.split(',')):
+        patterns = synthetic_corpus(n)
+        legacy = '-'
+        if n <= args.legacy_max:
+            start = time.perf_counter()
+            legacy_build(patterns, tokenize, lemmatize)
+            legacy = f"{time.perf_counter() - start:.2f}s"
+
+        dense = '-'
+        # A dense uint8 matrix at 1M x 5000 would need 5GB
+        if n <= args.dense_max:
+            start = time.perf_counter()
+            vectorized_build(patterns, tokenize, lemmatize, sparse=False)
+            dense = f"{time.perf_counter() - start:.2f}s"
+
+        start = time.perf_counter()
+        vectorized_build(patterns, tokenize, lemmatize, sparse=True)
+        sparse = f"{time.perf_counter() - start:.2f}s"
+
+        print(f"{n:>9} {legacy:>10} {dense:>10} {sparse:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Request-path cost of transcript logging: a synchronous append per request
+versus TranscriptLogger's queue and background writer.
+
+Also simulates a slow disk to show backpressure: normal records are dropped
+and counted, crisis records are all written, and close() flushes what is
+queued.
+
+Usage: python benchmarks/bench_transcripts.py [--records 50000] [--slow-write-ms 50]
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils import transcripts as transcript_module
+from utils.transcripts import TranscriptLogger
+
+
+def record(i, crisis=None):
+    return {'ts': time.time(), 'session_id': f"s{i % 1000}", 'message': "I've been feeling anxious about work",
+            'intents': [{'intent': 'anxiety', 'probability': 0.91}, {'intent': 'work_stress', 'probability': 0.3}],
+            'crisis': crisis, 'response': "It's understandable to feel anxious.", 'latency_ms': 1.2}
+
+
+def count_written(directory):
+    total = 0
+    for name in os.listdir(directory):
+        with gzip.open(os.path.join(directory, name), 'rt') as f:
+            total += sum(1 for _ in f)
+    return total
+
+
+class SlowSink(transcript_module._JsonlSink):
+    delay = 0.05
+
+    def write(self, records):
+        time.sleep(self.delay)
+        super().write(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=50000)
+    parser.add_argument('--slow-write-ms', type=float, default=50)
+    args = parser.parse_args()
+    n = args.records
+
+    path = os.path.join(tempfile.mkdtemp(), 'sync.jsonl')
+    started = time.perf_counter()
+    for i in range(n):
+        with open(path, 'a') as f:
+            f.write(json.dumps(record(i)) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+    sync = (time.perf_counter() - started) / n
+    print(f"synchronous fsync'd append: {1e6 * sync:8.1f}us per request")
+
+    directory = tempfile.mkdtemp()
+    logger = TranscriptLogger(directory, max_queue=n)
+    started = time.perf_counter()
+    for i in range(n):
+        logger.log(record(i))
+    queued = (time.perf_counter() - started) / n
+    logger.close()
+    stats = logger.stats()
+    print(f"queued logger:              {1e6 * queued:8.1f}us per request "
+          f"({stats['written']} written in {stats['batches']} batches, {count_written(directory)} on disk)")
+
+    # Slow disk: a small queue fills up and normal records are shed
+    SlowSink.delay = args.slow_write_ms / 1000.0
+    transcript_module.SINKS['slow'] = SlowSink
+    directory = tempfile.mkdtemp()
+    logger = TranscriptLogger(directory, fmt='slow', max_queue=1000, flush_interval=0.01)
+    crisis = 0
+    for i in range(n):
+        is_crisis = i % 500 == 0
+        crisis += is_crisis
+        logger.log(record(i, 'crisis' if is_crisis else None), crisis=is_crisis)
+    logger.close(timeout=60)
+    stats = logger.stats()
+    print(f"slow disk ({args.slow_write_ms:.0f}ms/batch):     {stats['written']} written, {stats['dropped']} dropped, "
+          f"crisis {stats['crisis_written']}/{crisis} written, {count_written(directory)} on disk")
+
+
+if __name__ == '__main__':
+    main()
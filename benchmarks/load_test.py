@@ -0,0 +1,250 @@
+"""
+Load test and latency benchmark for /get_response.
+
+Replays a realistic message mix (greetings, short and long messages, crisis
+phrases) either in-process through Flask's test client, where latency is
+also split into the crisis check, featurization (clean_up_sentence and
+bag_of_words), the model forward pass and get_response, or against a real
+local gunicorn server. Results are written as JSON so runs can be compared
+between model or code versions.
+
+Usage:
+    python benchmarks/load_test.py --mode test-client --requests 2000
+    python benchmarks/load_test.py --mode gunicorn --workers 4 --concurrency 16 -o results.json
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+GREETINGS = ["Hi", "Hello", "Hey there", "Good morning", "Thanks", "Thank you so much", "Bye"]
+SHORT = [
+    "I'm stressed out",
+    "I feel anxious all the time",
+    "I can't sleep",
+    "Can you suggest some yoga for stress?",
+    "I feel lonely",
+]
+LONG = [
+    "I've been having a really hard time at work lately. My manager keeps piling on more projects "
+    "and I don't feel like I can say no. I come home exhausted and then I can't fall asleep because "
+    "my mind keeps racing about everything I didn't finish. How do I deal with this?",
+    "My relationship ended a few weeks ago and I thought I'd be over it by now. Some days are fine "
+    "but other days I just sit in my room and don't want to see anyone. My friends keep inviting me "
+    "out but I keep making excuses. Is this normal?",
+]
+CRISIS = [
+    "I want to end my life",
+    "I've been thinking about suicide",
+    "Sometimes I hurt myself when things get bad",
+]
+
+# (messages, share of traffic)
+MIX = [(GREETINGS, 0.4), (SHORT, 0.3), (LONG, 0.2), (CRISIS, 0.1)]
+
+
+def message_stream(n, seed=0):
+    rng = random.Random(seed)
+    groups = [g for g, _ in MIX]
+    weights = [w for _, w in MIX]
+    return [rng.choice(rng.choices(groups, weights)[0]) for _ in range(n)]
+
+
+def percentiles(samples):
+    if not samples:
+        return None
+    s = sorted(samples)
+
+    def pick(q):
+        return 1000.0 * s[min(len(s) - 1, int(q * len(s)))]
+
+    return {'count': len(s), 'mean_ms': 1000.0 * sum(s) / len(s),
+            'p50_ms': pick(0.50), 'p95_ms': pick(0.95), 'p99_ms': pick(0.99), 'max_ms': 1000.0 * s[-1]}
+
+
+class StageTimer:
+    """
+    Collects per-stage durations recorded from whichever thread ran them
+    """
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def wrap(self, stage, fn):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self.samples[stage].append(elapsed)
+        return timed
+
+
+class _TimedModel:
+    def __init__(self, model, timer):
+        self._model = model
+        self.predict = timer.wrap('model.predict', model.predict)
+        if hasattr(model, 'predict_sparse'):
+            self.predict_sparse = timer.wrap('model.predict', model.predict_sparse)
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+
+def instrument(chatbot, timer):
+    chatbot.check_for_crisis = timer.wrap('check_for_crisis', chatbot.check_for_crisis)
+    chatbot.sparse_bag_of_words = timer.wrap('clean_up_sentence/bag_of_words', chatbot.sparse_bag_of_words)
+    chatbot.get_response = timer.wrap('get_response', chatbot.get_response)
+    if chatbot.active.batcher is not None:
+        # Includes the time spent waiting for the batch window
+        chatbot.active.batcher.predict = timer.wrap('model.predict', chatbot.active.batcher.predict)
+    else:
+        chatbot.active.model = _TimedModel(chatbot.active.model, timer)
+
+
+def drive(send, messages, concurrency):
+    latencies = []
+    lock = threading.Lock()
+
+    def one(message):
+        start = time.perf_counter()
+        send(message)
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+
+    started = time.perf_counter()
+    if concurrency <= 1:
+        for m in messages:
+            one(m)
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(one, messages))
+    wall = time.perf_counter() - started
+    return latencies, wall
+
+
+def run_test_client(args, messages):
+    os.chdir(ROOT)
+    import app as chatbot
+    if not args.keep_cache:
+        chatbot.prediction_cache = None
+    timer = StageTimer()
+    instrument(chatbot, timer)
+    client = chatbot.app.test_client()
+
+    def send(message):
+        resp = client.post('/get_response', json={'message': message})
+        if resp.status_code != 200:
+            raise RuntimeError(f"HTTP {resp.status_code}")
+
+    for m in messages[:args.warmup]:
+        send(m)
+    timer.samples.clear()
+    latencies, wall = drive(send, messages, args.concurrency)
+    stages = {stage: percentiles(samples) for stage, samples in timer.samples.items()}
+    return latencies, wall, stages
+
+
+def wait_for_port(port, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"gunicorn did not start listening on port {port}")
+
+
+def run_gunicorn(args, messages):
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-w', str(args.workers), '--threads', str(args.threads),
+         '-b', f'127.0.0.1:{args.port}', 'app:app'],
+        cwd=ROOT,
+    )
+    try:
+        wait_for_port(args.port, args.startup_timeout)
+        url = f'http://127.0.0.1:{args.port}/get_response'
+
+        def send(message):
+            req = urllib.request.Request(url, data=json.dumps({'message': message}).encode(),
+                                         headers={'Content-Type': 'application/json'})
+            with urllib.request.urlopen(req, timeout=30) as resp:
+                resp.read()
+
+        for m in messages[:args.warmup]:
+            send(m)
+        latencies, wall = drive(send, messages, args.concurrency)
+        return latencies, wall, None
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--mode', choices=['test-client', 'gunicorn'], default='test-client')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--keep-cache', action='store_true',
+                        help="leave the prediction cache on (test-client mode)")
+    parser.add_argument('--workers', type=int, default=2, help="gunicorn workers")
+    parser.add_argument('--threads', type=int, default=4, help="gunicorn threads per worker")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--startup-timeout', type=float, default=120.0)
+    parser.add_argument('-o', '--output', help="write the JSON results to this file")
+    args = parser.parse_args()
+
+    messages = message_stream(args.requests)
+    if args.mode == 'test-client':
+        latencies, wall, stages = run_test_client(args, messages)
+    else:
+        latencies, wall, stages = run_gunicorn(args, messages)
+
+    results = {
+        'mode': args.mode,
+        'git_revision': git_revision(),
+        'model_backend': os.environ.get('MODEL_BACKEND', 'keras'),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'requests': len(latencies),
+        'concurrency': args.concurrency,
+        'throughput_rps': len(latencies) / wall,
+        'latency': percentiles(latencies),
+        'stages': stages,
+    }
+    if args.mode == 'gunicorn':
+        results['workers'] = args.workers
+        results['threads'] = args.threads
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
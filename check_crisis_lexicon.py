@@ -0,0 +1,53 @@
+"""
+Regression check for the crisis lexicon: every message listed under a
+severity in the cases file must be detected at exactly that severity, and
+none of the no_match messages may be detected at all. Run it after every
+lexicon edit; it exits non-zero on the first failing case set.
+
+Usage:
+    python check_crisis_lexicon.py [--lexicon data/crisis_lexicon.json]
+                                   [--cases data/crisis_regression.json]
+"""
+import argparse
+import json
+import sys
+
+from utils.crisis import CrisisDetector
+
+
+def check(detector, cases):
+    """
+    Failure messages for every case the detector gets wrong
+    """
+    failures = []
+    for severity, messages in cases['match'].items():
+        for message in messages:
+            match = detector.detect(message)
+            if match is None or match.severity != severity:
+                found = f"{match.severity} ({match.phrase!r})" if match else "no match"
+                failures.append(f"{message!r}: expected {severity}, got {found}")
+    for message in cases['no_match']:
+        match = detector.detect(message)
+        if match is not None:
+            failures.append(f"{message!r}: expected no match, got {match.severity} ({match.phrase!r})")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lexicon', default='data/crisis_lexicon.json')
+    parser.add_argument('--cases', default='data/crisis_regression.json')
+    args = parser.parse_args()
+
+    with open(args.cases, 'r', encoding='utf-8') as f:
+        cases = json.load(f)
+    failures = check(CrisisDetector(args.lexicon, reload_interval=0), cases)
+    total = sum(len(m) for m in cases['match'].values()) + len(cases['no_match'])
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print(f"{total - len(failures)}/{total} crisis lexicon cases passed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
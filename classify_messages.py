@@ -0,0 +1,135 @@
+"""
+Offline bulk intent classification for archived chat messages.
+
+Reads JSONL (one {"id": ..., "message": ...} object or bare JSON string per
+line) from a file or stdin and writes one JSONL result per input line, using
+the same predict_class pipeline as the app. Tokenization and lemmatization
+(and the crisis check) are spread across a process pool; featurization and the forward pass run
+vectorized per chunk in the main process. A line that is not valid JSON or
+has no string "message" gets an {"error": ...} result (with its id, if any).
+The app's own log messages go to stderr, so stdout carries only results.
+
+Usage:
+    python classify_messages.py archive.jsonl -o scored.jsonl --workers 8
+    cat archive.jsonl | python classify_messages.py > scored.jsonl
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from itertools import islice
+
+from utils.crisis import CrisisDetector
+from utils.preprocessor import clean_up_sentence, set_text_engine
+
+# The app (model, batcher, registry watcher) is imported by classify_stream
+# only: spawned workers re-import this module and must not load it
+_crisis_detector = None
+
+
+def init_worker(lexicon_path, text_engine):
+    """
+    Runs once in each worker: build just the crisis detector and the text
+    engine the chunks need
+    """
+    global _crisis_detector
+    _crisis_detector = CrisisDetector(lexicon_path)
+    set_text_engine(text_engine)
+
+
+def read_chunks(lines, chunk_size, parse_line):
+    records = (parse_line(line) for line in lines if line.strip())
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def tokenize_chunk(chunk):
+    """
+    Runs in a worker process: crisis-check and lemmatize every valid message
+    of a chunk of (id, message, error) records
+    """
+    crises = []
+    lemma_lists = []
+    for _, message, error in chunk:
+        if error is not None:
+            continue
+        crisis = _crisis_detector.detect(message)
+        crises.append(crisis.severity if crisis else None)
+        lemma_lists.append(clean_up_sentence(message))
+    return chunk, crises, lemma_lists
+
+
+def classify_stream(lines, out, workers=None, chunk_size=1024):
+    """
+    Classify every JSONL record in lines and write results to out.
+    Returns the number of lines processed.
+    """
+    import app as chatbot
+
+    chunks = read_chunks(lines, chunk_size, chatbot.parse_batch_line)
+    worker_args = (chatbot.crisis_detector.path, chatbot.active.text_engine)
+    if workers == 1:
+        init_worker(*worker_args)
+        tokenized = map(tokenize_chunk, chunks)
+        pool = None
+    else:
+        # Spawned, not forked: the app has already started TensorFlow and
+        # background threads, which a forked child would inherit half-copied
+        pool = mp.get_context('spawn').Pool(workers, initializer=init_worker, initargs=worker_args)
+        tokenized = pool.imap(tokenize_chunk, chunks)
+
+    count = 0
+    try:
+        for chunk, crises, lemma_lists in tokenized:
+            results = zip(crises, chatbot.classify_lemmatized(lemma_lists))
+            for record_id, _, error in chunk:
+                if error is not None:
+                    result = {'error': error}
+                else:
+                    crisis, intents = next(results)
+                    result = {'crisis': crisis, 'intents': intents}
+                if record_id is not None:
+                    result['id'] = record_id
+                out.write(json.dumps(result) + '\n')
+            count += len(chunk)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('input', nargs='?', help="JSONL input file (default: stdin)")
+    parser.add_argument('-o', '--output', help="JSONL output file (default: stdout)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help="tokenization processes (1 disables the pool)")
+    parser.add_argument('--chunk-size', type=int, default=1024)
+    args = parser.parse_args()
+
+    source = open(args.input, 'r', encoding='utf-8') if args.input else sys.stdin
+    sink = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    start = time.perf_counter()
+    try:
+        # Anything the app prints (startup, model swaps) goes to stderr
+        with contextlib.redirect_stdout(sys.stderr):
+            count = classify_stream(source, sink, args.workers, args.chunk_size)
+    finally:
+        if args.input:
+            source.close()
+        if args.output:
+            sink.close()
+    elapsed = time.perf_counter() - start
+    print(f"Classified {count} lines in {elapsed:.1f}s "
+          f"({count / elapsed if elapsed else 0:,.0f} lines/sec, {args.workers} workers)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Post-training int8 quantization of the intent model, with an evaluation
+against the float32 model on the training patterns.
+
+Writes the int8 weights used by MODEL_BACKEND=quantized and a report of
+top-1 intent agreement, probability drift, per-request latency and weight
+memory for both models. The crisis check does not use the intent model and
+is unaffected by the backend choice.
+
+Usage:
+    python quantize_model.py [--weights models/mental_health_chatbot_weights.npz]
+                             [--output models/mental_health_chatbot_int8.npz]
+                             [--corpus data/mental_health_intents.json]
+"""
+import argparse
+import json
+import os
+import pickle
+import time
+
+import numpy as np
+
+from utils.corpus import iter_patterns
+from utils.numpy_model import NumpyIntentModel
+from utils.preprocessor import clean_up_sentence, lemmas_to_columns, load_word_index
+from utils.quantization import QuantizedIntentModel, export_quantized
+
+# Same cut-off as app.py's predict_class
+ERROR_THRESHOLD = 0.25
+
+
+def latency_ms(model, rows, repeat):
+    """
+    Median and p99 of single-message predict_sparse calls
+    """
+    latencies = []
+    for _ in range(repeat):
+        for columns in rows:
+            start = time.perf_counter()
+            model.predict_sparse([columns])
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return 1000 * latencies[len(latencies) // 2], 1000 * latencies[int(len(latencies) * 0.99)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--weights', default='models/mental_health_chatbot_weights.npz')
+    parser.add_argument('--output', default='models/mental_health_chatbot_int8.npz')
+    parser.add_argument('--corpus', nargs='*', default=['data/mental_health_intents.json'])
+    parser.add_argument('--report', default='models/quantization_report.json')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    float_model = NumpyIntentModel(args.weights)
+    export_quantized(float_model.layers, args.output)
+    int8_model = QuantizedIntentModel(args.output)
+    print(f"int8 weights written to '{args.output}'")
+
+    words = pickle.load(open('models/words.pkl', 'rb'))
+    word_index = load_word_index('models/word_index.pkl', words)
+    rows = [lemmas_to_columns(clean_up_sentence(pattern), word_index)
+            for pattern, _ in iter_patterns(args.corpus)]
+
+    p_float = float_model.predict_sparse(rows)
+    p_int8 = int8_model.predict_sparse(rows)
+    drift = np.abs(p_float - p_int8)
+    # Messages whose best intent moves across the fallback threshold
+    crossed = (p_float.max(axis=1) > ERROR_THRESHOLD) != (p_int8.max(axis=1) > ERROR_THRESHOLD)
+
+    float_p50, float_p99 = latency_ms(float_model, rows, args.repeat)
+    int8_p50, int8_p99 = latency_ms(int8_model, rows, args.repeat)
+    float_bytes = sum(W.nbytes + b.nbytes for W, b in float_model.layers)
+
+    report = {
+        'patterns': len(rows),
+        'top1_agreement': float((p_float.argmax(axis=1) == p_int8.argmax(axis=1)).mean()),
+        'max_prob_drift': float(drift.max()),
+        'mean_prob_drift': float(drift.mean()),
+        'threshold_crossings': int(crossed.sum()),
+        'float32': {'p50_ms': float_p50, 'p99_ms': float_p99, 'weight_bytes': float_bytes,
+                    'file_bytes': os.path.getsize(args.weights)},
+        'int8': {'p50_ms': int8_p50, 'p99_ms': int8_p99, 'weight_bytes': int8_model.nbytes,
+                 'file_bytes': os.path.getsize(args.output)},
+    }
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=4)
+
+    print(f"top-1 agreement on {report['patterns']} patterns: {100 * report['top1_agreement']:.2f}%")
+    print(f"probability drift: max {report['max_prob_drift']:.4f}, mean {report['mean_prob_drift']:.5f}, "
+          f"{report['threshold_crossings']} fallback threshold crossings")
+    print(f"float32: p50 {float_p50:.3f}ms p99 {float_p99:.3f}ms, {float_bytes / 1024:.1f}KB weights")
+    print(f"int8:    p50 {int8_p50:.3f}ms p99 {int8_p99:.3f}ms, {int8_model.nbytes / 1024:.1f}KB weights")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Hyperparameter sweep for the intent model.
+
+Expands a grid or random search spec (see data/sweep_spec.json), trains the
+trials in parallel in a process pool with early stopping on a held-out
+split of every intent's patterns, and writes a leaderboard of validation
+accuracy against training time, model size and inference latency. The best
+configuration that fits --latency-budget-ms is written to
+best_config.json, which train_model.py --config accepts.
+
+Usage:
+    python sweep_model.py [data/sweep_spec.json] [--workers 8] [--latency-budget-ms 0.05]
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from utils.corpus import iter_patterns
+from utils.dataset import MemoizedPreprocessor, build_vocabulary, build_training_matrix
+from utils.preprocessor import build_word_index
+from utils.sweep import init_worker, run_trial, split_holdout, trial_configs, write_leaderboard
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('spec', nargs='?', default='data/sweep_spec.json')
+    parser.add_argument('--corpus', nargs='*', default=['data/mental_health_intents.json'])
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--holdout', type=float, default=0.2, help="fraction of each intent's patterns held out")
+    parser.add_argument('--patience', type=int, default=15, help="epochs without validation improvement")
+    parser.add_argument('--latency-budget-ms', type=float, default=None)
+    parser.add_argument('--output-dir', default='models/sweep')
+    args = parser.parse_args()
+
+    with open(args.spec) as f:
+        configs = trial_configs(json.load(f))
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    # Featurize once; every worker loads the same split
+    preprocessor = MemoizedPreprocessor()
+    words, classes, documents = build_vocabulary(iter_patterns(args.corpus), preprocessor)
+    x, y = build_training_matrix(documents, build_word_index(words), {tag: i for i, tag in enumerate(classes)})
+    train, validation = split_holdout(y, args.holdout)
+    data_path = os.path.join(args.output_dir, 'split.npz')
+    np.savez(data_path, train_x=x[train], train_y=y[train], val_x=x[validation], val_y=y[validation],
+             n_classes=len(classes))
+    print(f"{len(configs)} trials on {len(train)} training / {len(validation)} held-out patterns, "
+          f"{args.workers} workers")
+
+    # Spawned workers, since TensorFlow is not fork-safe; each gets an
+    # equal share of the cores for its intra-op threads
+    threads = max(1, (os.cpu_count() or 1) // args.workers)
+    results = []
+    started = time.perf_counter()
+    with ProcessPoolExecutor(args.workers, mp_context=mp.get_context('spawn'),
+                             initializer=init_worker, initargs=(data_path, threads)) as pool:
+        futures = {pool.submit(run_trial, i, config, args.patience): i for i, config in enumerate(configs)}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"trial {futures[future]} failed: {e}")
+                continue
+            results.append(result)
+            print(f"trial {result['trial']:>3}: val accuracy {result['val_accuracy']:.3f} in "
+                  f"{result['train_seconds']:.1f}s ({result['epochs_run']} epochs) {result['config']}")
+    print(f"Sweep took {time.perf_counter() - started:.1f}s")
+    if not results:
+        return
+
+    leaderboard = write_leaderboard(results, os.path.join(args.output_dir, 'leaderboard.json'))
+    print(f"{'rank':>4} {'val acc':>8} {'train':>8} {'params':>9} {'p50':>9}  config")
+    for rank, r in enumerate(leaderboard[:10], 1):
+        print(f"{rank:>4} {r['val_accuracy']:>8.3f} {r['train_seconds']:>7.1f}s {r['parameters']:>9,} "
+              f"{r['p50_latency_ms']:>7.4f}ms  {r['config']}")
+
+    within_budget = [r for r in leaderboard
+                     if args.latency_budget_ms is None or r['p50_latency_ms'] <= args.latency_budget_ms]
+    if not within_budget:
+        print(f"No configuration meets the {args.latency_budget_ms}ms latency budget")
+        return
+    best = within_budget[0]
+    with open(os.path.join(args.output_dir, 'best_config.json'), 'w') as f:
+        # The early-stopped length the leaderboard measured, not the epoch cap
+        json.dump(dict(best['config'], epochs=best['best_epoch']), f, indent=4)
+    print(f"Best configuration (trial {best['trial']}) written to "
+          f"'{os.path.join(args.output_dir, 'best_config.json')}'")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import time
+
+import numpy as np
+
+MAGIC = b'CHATBNDL'
+FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct('<8sII')  # magic, format version, header length
+_ALIGN = 64
+
+
+def _align(n):
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def write_bundle(path, words, classes, intents, layers, version=None):
+    """
+    Write vocabulary, classes, intents and Dense weights into one versioned
+    bundle file.
+
+    Layout: a fixed preamble, a JSON header describing every section, then
+    the sections themselves, each 64-byte aligned so the weight arrays can
+    be used in place from a memory map. The header records a SHA-256 of
+    everything after it.
+    """
+    sections = [
+        ('words', json.dumps(words).encode('utf-8'), None),
+        ('classes', json.dumps(classes).encode('utf-8'), None),
+        ('intents', json.dumps(intents).encode('utf-8'), None),
+    ]
+    for i, (W, b) in enumerate(layers):
+        for name, arr in ((f'W{i}', W), (f'b{i}', b)):
+            arr = np.ascontiguousarray(arr, dtype='<f4')
+            sections.append((name, arr.tobytes(), {'dtype': '<f4', 'shape': list(arr.shape)}))
+
+    index = {}
+    offset = 0
+    for name, data, array_info in sections:
+        entry = {'offset': offset, 'nbytes': len(data)}
+        if array_info:
+            entry.update(array_info)
+        index[name] = entry
+        offset = _align(offset + len(data))
+    payload_size = offset
+
+    payload = bytearray(payload_size)
+    for name, data, _ in sections:
+        start = index[name]['offset']
+        payload[start:start + len(data)] = data
+
+    header = {
+        'version': version or time.strftime('%Y%m%d%H%M%S'),
+        'sha256': hashlib.sha256(payload).hexdigest(),
+        'n_layers': len(layers),
+        'sections': index,
+    }
+    header_bytes = json.dumps(header).encode('utf-8')
+    # Pad the header so the payload starts aligned
+    header_bytes += b' ' * (_align(_PREAMBLE.size + len(header_bytes)) - _PREAMBLE.size - len(header_bytes))
+
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(payload)
+    os.replace(tmp, path)
+    return header['version']
+
+
+class BundleIntegrityError(Exception):
+    pass
+
+
+class ArtifactBundle:
+    """
+    Read-only memory map of a bundle written by write_bundle().
+
+    The weight arrays are zero-copy views into the shared file mapping, so
+    every gunicorn worker that maps the same bundle shares its physical
+    pages. The vocabulary, classes and intents are small JSON sections
+    decoded once per worker.
+    """
+
+    def __init__(self, path, verify=True):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, fmt, header_len = _PREAMBLE.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise BundleIntegrityError(f"{path} is not a chatbot artifact bundle")
+        if fmt != FORMAT_VERSION:
+            raise BundleIntegrityError(f"{path} has unsupported bundle format {fmt}")
+        self.header = json.loads(self._mmap[_PREAMBLE.size:_PREAMBLE.size + header_len])
+        self._base = _PREAMBLE.size + header_len
+
+        if verify:
+            digest = hashlib.sha256(memoryview(self._mmap)[self._base:]).hexdigest()
+            if digest != self.header['sha256']:
+                raise BundleIntegrityError(f"{path} failed its integrity check")
+
+        self.version = self.header['version']
+        self.words = self._json('words')
+        self.classes = self._json('classes')
+        self.intents = self._json('intents')
+        self.layers = [(self._array(f'W{i}'), self._array(f'b{i}'))
+                       for i in range(self.header['n_layers'])]
+
+    def _json(self, name):
+        entry = self.header['sections'][name]
+        start = self._base + entry['offset']
+        return json.loads(self._mmap[start:start + entry['nbytes']])
+
+    def _array(self, name):
+        entry = self.header['sections'][name]
+        count = int(np.prod(entry['shape']))
+        arr = np.frombuffer(self._mmap, dtype=entry['dtype'], count=count,
+                            offset=self._base + entry['offset'])
+        return arr.reshape(entry['shape'])
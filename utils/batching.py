@@ -0,0 +1,145 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent single-row predictions into one batched forward pass.
+
+    Requests call predict() with one feature vector. A background worker
+    collects pending vectors until either max_batch_size rows are waiting or
+    window_ms has passed since the first one arrived, runs predict_fn once on
+    the stacked batch and hands each probability row back to its caller.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=32, window_ms=5.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.window = max(0.0, float(window_ms)) / 1000.0
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stopped = False
+
+        # Metrics
+        self._batches = 0
+        self._rows = 0
+        self._max_queue_depth = 0
+        self._batch_sizes = {}
+        self._wait_total = 0.0
+        self._predict_total = 0.0
+
+    def _ensure_worker(self):
+        # Threads do not survive a fork, so a gunicorn worker started from a
+        # preloaded app has to spawn its own batching thread.
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._queue = queue.Queue()
+            self._pid = os.getpid()
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+            self._thread.start()
+
+    def submit(self, row):
+        """
+        Queue one feature vector and return a Future for its probability row
+        """
+        if self._stopped:
+            raise RuntimeError("MicroBatcher has been stopped")
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((np.asarray(row, dtype=np.float32), future, time.perf_counter()))
+        depth = self._queue.qsize()
+        if depth > self._max_queue_depth:
+            self._max_queue_depth = depth
+        return future
+
+    def predict(self, row, timeout=None):
+        """
+        Blocking helper: submit one row and wait for its probabilities
+        """
+        return self.submit(row).result(timeout=timeout)
+
+    def stop(self, timeout=1.0):
+        """
+        Stop the worker thread after draining what is already queued
+        """
+        self._stopped = True
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    item = self._queue.get_nowait()
+                else:
+                    item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Put the stop marker back so the run loop sees it
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+
+            rows = np.stack([item[0] for item in batch])
+            started = time.perf_counter()
+            try:
+                probs = np.asarray(self.predict_fn(rows))
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            finished = time.perf_counter()
+
+            for i, (_, future, enqueued) in enumerate(batch):
+                future.set_result(probs[i])
+                self._wait_total += started - enqueued
+
+            size = len(batch)
+            self._batches += 1
+            self._rows += size
+            self._batch_sizes[size] = self._batch_sizes.get(size, 0) + 1
+            self._predict_total += finished - started
+
+    def stats(self):
+        """
+        Queue depth and batch-size metrics for tuning the window
+        """
+        batches = self._batches
+        rows = self._rows
+        return {
+            'queue_depth': self._queue.qsize(),
+            'max_queue_depth': self._max_queue_depth,
+            'max_batch_size': self.max_batch_size,
+            'window_ms': self.window * 1000.0,
+            'batches': batches,
+            'rows': rows,
+            'mean_batch_size': rows / batches if batches else 0.0,
+            'batch_size_histogram': dict(sorted(self._batch_sizes.items())),
+            'mean_queue_wait_ms': 1000.0 * self._wait_total / rows if rows else 0.0,
+            'mean_predict_ms': 1000.0 * self._predict_total / batches if batches else 0.0,
+        }
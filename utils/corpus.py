@@ -0,0 +1,77 @@
+import csv
+import json
+import os
+
+
+def iter_intents(path):
+    """
+    Stream intent records ({'tag', 'patterns', 'responses'}) from a corpus file.
+
+    Supported formats:
+      .json   {"intents": [{"tag", "patterns", "responses"}, ...]}
+      .jsonl  one intent object per line, or one {"tag", "pattern"[, "response"]}
+              record per line
+      .csv    columns tag, pattern and optionally response, one row per pattern
+
+    JSONL and CSV are read line by line; use them for very large corpora.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.json':
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from json.load(f)['intents']
+    elif ext == '.jsonl':
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield _normalize_record(json.loads(line))
+    elif ext == '.csv':
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                yield _normalize_record(row)
+    else:
+        raise ValueError(f"Unsupported corpus format: {path}")
+
+
+def _normalize_record(record):
+    if 'patterns' in record:
+        return record
+    response = record.get('response')
+    return {
+        'tag': record['tag'],
+        'patterns': [record['pattern']] if record.get('pattern') else [],
+        'responses': [response] if response else [],
+    }
+
+
+def iter_patterns(paths):
+    """
+    Stream (pattern, tag) pairs from every corpus file in order
+    """
+    for path in paths:
+        for intent in iter_intents(path):
+            for pattern in intent['patterns']:
+                yield pattern, intent['tag']
+
+
+def compile_intents(paths, output_path):
+    """
+    Merge the responses of every corpus file by tag and write the combined
+    intents file the app loads responses from. Patterns are left out: the
+    app never reads them, and training streams them with iter_patterns.
+    """
+    merged = {}
+    seen = {}
+    for path in paths:
+        for intent in iter_intents(path):
+            tag = intent['tag']
+            entry = merged.setdefault(tag, {'tag': tag, 'responses': []})
+            known = seen.setdefault(tag, set())
+            for response in intent.get('responses', []):
+                if response not in known:
+                    known.add(response)
+                    entry['responses'].append(response)
+    intents = {'intents': list(merged.values())}
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(intents, f, indent=4)
+    return intents
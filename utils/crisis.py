@@ -0,0 +1,185 @@
+import json
+import os
+import threading
+import time
+import unicodedata
+from collections import deque, namedtuple
+
+# Severity levels map to the safety_responses keys in app.py, lowest first
+SEVERITY_ORDER = ('crisis', 'harm', 'emergency')
+
+CrisisMatch = namedtuple('CrisisMatch', ['phrase', 'severity', 'start', 'end'])
+
+_APOSTROPHES = str.maketrans({'’': "'", '‘': "'", 'ʼ': "'"})
+
+
+def normalize(text):
+    """
+    Case-fold and unify apostrophe variants so "Don’t" matches "don't"
+    """
+    return text.translate(_APOSTROPHES).casefold()
+
+
+# Scripts written without spaces between words, where a phrase sits
+# directly between other letters
+_UNSPACED_SCRIPTS = ('CJK UNIFIED', 'CJK COMPATIBILITY IDEOGRAPH', 'HIRAGANA', 'KATAKANA', 'HALFWIDTH KATAKANA',
+                     'THAI', 'LAO', 'KHMER', 'MYANMAR')
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == '_'
+
+
+def _needs_boundary(ch):
+    """
+    Whether a phrase starting or ending with ch must stop at a word boundary
+    there
+    """
+    return _is_word_char(ch) and not unicodedata.name(ch, '').startswith(_UNSPACED_SCRIPTS)
+
+
+class _Automaton:
+    """
+    Aho-Corasick automaton over the lexicon phrases.
+
+    Every phrase is matched in a single left-to-right pass over the message,
+    whatever the size of the lexicon. A phrase ending in "*" is a stem and
+    also matches with any word ending ("suicid*" for suicide, suicides and
+    suicidal).
+    """
+
+    def __init__(self, phrases):
+        # phrases: iterable of (phrase, severity)
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        for phrase, severity in phrases:
+            phrase = normalize(phrase).strip()
+            stem = phrase.endswith('*')
+            phrase = phrase.rstrip('*').strip()
+            if not phrase:
+                continue
+            node = 0
+            for ch in phrase:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                node = nxt
+            self.out[node].append((phrase, severity, len(phrase), _needs_boundary(phrase[0]),
+                                   not stem and _needs_boundary(phrase[-1])))
+        self._build_fail_links()
+
+    def _build_fail_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(ch, 0)
+                self.fail[child] = target if target != child else 0
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def scan(self, text):
+        """
+        Yield every whole-word lexicon match in text as a CrisisMatch
+        """
+        goto, fail, out = self.goto, self.fail, self.out
+        node = 0
+        n = len(text)
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if not out[node]:
+                continue
+            end = i + 1
+            for phrase, severity, length, check_start, check_end in out[node]:
+                start = end - length
+                # Word-boundary check, so "die" does not fire inside "diet"
+                if check_start and start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if check_end and end < n and _is_word_char(text[end]):
+                    continue
+                yield CrisisMatch(phrase, severity, start, end)
+
+
+def load_lexicon(path):
+    """
+    Read a {severity: [phrase, ...]} JSON lexicon into (phrase, severity) pairs
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        lexicon = json.load(f)
+    phrases = []
+    for severity, entries in lexicon.items():
+        if severity not in SEVERITY_ORDER:
+            raise ValueError(f"Unknown crisis severity '{severity}' in {path}")
+        phrases.extend((phrase, severity) for phrase in entries)
+    return phrases
+
+
+class CrisisDetector:
+    """
+    Crisis keyword scanner compiled once from a lexicon file.
+
+    The file's modification time is checked at most every reload_interval
+    seconds, and a changed lexicon is recompiled and swapped in without a
+    restart.
+    """
+
+    def __init__(self, path, reload_interval=5.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked = 0.0
+        self._automaton = None
+        self.reload()
+
+    def reload(self):
+        """
+        Recompile the lexicon from disk and swap it in atomically
+        """
+        with self._lock:
+            mtime = os.path.getmtime(self.path)
+            automaton = _Automaton(load_lexicon(self.path))
+            self._automaton = automaton
+            self._mtime = mtime
+            self._checked = time.monotonic()
+        return automaton
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if not self.reload_interval or now - self._checked < self.reload_interval:
+            return
+        self._checked = now
+        try:
+            changed = os.path.getmtime(self.path) != self._mtime
+        except OSError:
+            return
+        if changed:
+            try:
+                self.reload()
+            except (OSError, ValueError) as e:
+                # Keep serving with the previous lexicon
+                print(f"Error reloading crisis lexicon: {e}")
+
+    def find_all(self, message):
+        self._maybe_reload()
+        return list(self._automaton.scan(normalize(message)))
+
+    def detect(self, message):
+        """
+        Return the highest-severity match in the message, or None
+        """
+        best = None
+        for match in self.find_all(message):
+            if best is None or SEVERITY_ORDER.index(match.severity) > SEVERITY_ORDER.index(best.severity):
+                best = match
+        return best
@@ -0,0 +1,126 @@
+import numpy as np
+
+IGNORE_LETTERS = frozenset(['?', '!', '.', ','])
+
+
+class MemoizedPreprocessor:
+    """
+    Tokenizer and lemmatizer with per-pattern and per-token memo tables.
+
+    Real corpora repeat the same patterns and, far more often, the same
+    tokens, so each unique pattern is tokenized once and each unique token
+    goes through WordNet once. The pattern table grows with the corpus, so
+    streaming training turns it off with cache_patterns=False; the token
+    table only grows with the vocabulary.
+    """
+
+    def __init__(self, tokenize=None, lemmatize=None, cache_patterns=True):
+        if tokenize is None:
+            import nltk
+            tokenize = nltk.word_tokenize
+        if lemmatize is None:
+            from nltk.stem import WordNetLemmatizer
+            lemmatize = WordNetLemmatizer().lemmatize
+        self._tokenize = tokenize
+        self._lemmatize = lemmatize
+        self._tokens = {} if cache_patterns else None
+        self._lemmas = {}
+
+    def tokenize(self, pattern):
+        if self._tokens is None:
+            return tuple(self._tokenize(pattern))
+        tokens = self._tokens.get(pattern)
+        if tokens is None:
+            tokens = self._tokens[pattern] = tuple(self._tokenize(pattern))
+        return tokens
+
+    def lemma(self, token):
+        lemma = self._lemmas.get(token)
+        if lemma is None:
+            lemma = self._lemmas[token] = self._lemmatize(token.lower())
+        return lemma
+
+    def lemma_table(self):
+        """
+        Lowercased token -> lemma for every token seen so far, the frozen
+        table utils.text_engine.LemmaTable serves without WordNet
+        """
+        return {token.lower(): lemma for token, lemma in self._lemmas.items()}
+
+
+def iter_documents(patterns, preprocessor):
+    """
+    Lazily turn (pattern, tag) pairs into (tokens, lemmas, tag) triples
+    """
+    for pattern, tag in patterns:
+        tokens = preprocessor.tokenize(pattern)
+        yield tokens, tuple(preprocessor.lemma(t) for t in tokens), tag
+
+
+def build_vocabulary(patterns, preprocessor, keep_documents=True):
+    """
+    Tokenize (pattern, tag) pairs once and derive the sorted vocabulary and
+    class list the same way the original training loop did.
+
+    Returns (words, classes, documents) where each document is a
+    (lemmas, tag) pair. With keep_documents=False the pairs are consumed in
+    a single streaming pass and documents is None.
+    """
+    vocab = set()
+    tags = set()
+    documents = [] if keep_documents else None
+    for tokens, lemmas, tag in iter_documents(patterns, preprocessor):
+        vocab.update(lemma for token, lemma in zip(tokens, lemmas) if token not in IGNORE_LETTERS)
+        tags.add(tag)
+        if keep_documents:
+            documents.append((lemmas, tag))
+    return sorted(vocab), sorted(tags), documents
+
+
+def iter_training_batches(patterns, preprocessor, word_index, class_index, batch_size, dtype=np.float32):
+    """
+    Stream (features, labels) batches so peak memory is bounded by the batch
+    size rather than the corpus size
+    """
+    chunk = []
+    for _, lemmas, tag in iter_documents(patterns, preprocessor):
+        chunk.append((lemmas, tag))
+        if len(chunk) == batch_size:
+            yield build_training_matrix(chunk, word_index, class_index, dtype=dtype)
+            chunk = []
+    if chunk:
+        yield build_training_matrix(chunk, word_index, class_index, dtype=dtype)
+
+
+def build_training_matrix(documents, word_index, class_index, dtype=np.float32, sparse=False):
+    """
+    Fill the bag-of-words feature matrix and integer label vector directly.
+
+    Column and label lookups go through the precomputed index maps, and the
+    matrix is preallocated once (or built as a scipy CSR matrix with
+    sparse=True) instead of growing nested Python lists.
+    """
+    n = len(documents)
+    labels = np.empty(n, dtype=np.int32)
+    rows = []
+    cols = []
+    for i, (lemmas, tag) in enumerate(documents):
+        labels[i] = class_index[tag]
+        seen = set()
+        for lemma in lemmas:
+            column = word_index.get(lemma)
+            if column is not None and column not in seen:
+                seen.add(column)
+                rows.append(i)
+                cols.append(column)
+
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    shape = (n, len(word_index))
+    if sparse:
+        from scipy.sparse import csr_matrix
+        features = csr_matrix((np.ones(len(rows), dtype=dtype), (rows, cols)), shape=shape)
+    else:
+        features = np.zeros(shape, dtype=dtype)
+        features[rows, cols] = 1
+    return features, labels
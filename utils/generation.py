@@ -0,0 +1,183 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from utils.cache import LRUCache
+
+PROMPT_PREFIX = "As a supportive mental health chatbot, respond to: "
+
+
+class GenerationService:
+    """
+    One loaded seq2seq model per process behind a bounded pool of batching
+    workers.
+
+    Concurrent generate() calls are coalesced into batches of up to
+    max_batch_size prompts (waiting at most window_ms for the batch to
+    fill), with the shared PROMPT_PREFIX tokenized once. Finished replies
+    are kept in an LRU keyed on the normalized message. A request gets
+    None, meaning "use the intent response instead", when the queue is
+    full, generation fails or it runs past its time budget.
+    """
+
+    def __init__(self, model, workers=1, max_batch_size=8, window_ms=10.0, max_new_tokens=64,
+                 time_budget=3.0, max_queue=64, cache_size=1024, prefix=PROMPT_PREFIX):
+        self.model = model
+        self.workers = max(1, int(workers))
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.window = max(0.0, float(window_ms)) / 1000.0
+        self.max_new_tokens = max_new_tokens
+        self.time_budget = time_budget
+        self.max_queue = max_queue
+        self.prefix = prefix
+        self.cache = LRUCache(max_entries=cache_size) if cache_size > 0 else None
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._threads = []
+        self._pid = None
+
+        # Metrics
+        self._requests = 0
+        self._cache_hits = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._failures = 0
+        self._batches = 0
+        self._rows = 0
+        self._generate_total = 0.0
+
+    def _ensure_workers(self):
+        # Threads do not survive a fork, so each gunicorn worker starts its own
+        if self._pid == os.getpid() and all(t.is_alive() for t in self._threads):
+            return
+        with self._lock:
+            if self._pid == os.getpid() and all(t.is_alive() for t in self._threads):
+                return
+            self._queue = queue.Queue(maxsize=self.max_queue)
+            self._pid = os.getpid()
+            self._threads = [threading.Thread(target=self._run, name=f'generate-{i}', daemon=True)
+                             for i in range(self.workers)]
+            for thread in self._threads:
+                thread.start()
+
+    @staticmethod
+    def _key(message, max_new_tokens):
+        return (' '.join(message.lower().split()), max_new_tokens)
+
+    def submit(self, message, max_new_tokens=None, time_budget=None):
+        """
+        Queue one message and return a Future for its reply (or None)
+        """
+        max_new_tokens = min(max_new_tokens or self.max_new_tokens, self.max_new_tokens)
+        time_budget = min(time_budget or self.time_budget, self.time_budget)
+        self._requests += 1
+        future = Future()
+        key = self._key(message, max_new_tokens)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self._cache_hits += 1
+                future.set_result(cached)
+                return future
+        self._ensure_workers()
+        deadline = time.perf_counter() + time_budget
+        try:
+            self._queue.put_nowait((message, max_new_tokens, deadline, key, future))
+        except queue.Full:
+            # Backpressure: answer from the intent model rather than queue
+            self._rejected += 1
+            future.set_result(None)
+        return future
+
+    def generate(self, message, max_new_tokens=None, time_budget=None):
+        """
+        Blocking helper: the generated reply, or None to fall back
+        """
+        budget = min(time_budget or self.time_budget, self.time_budget)
+        try:
+            # Slack for handing the reply back; generation itself is cut at the budget
+            return self.submit(message, max_new_tokens, budget).result(timeout=budget + 0.1)
+        except Exception:
+            return None
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect(self._queue.get())
+            now = time.perf_counter()
+            # Requests whose budget ran out while queued fall back right away
+            live = []
+            for item in batch:
+                if item[2] <= now:
+                    self._timeouts += 1
+                    item[4].set_result(None)
+                else:
+                    live.append(item)
+            if not live:
+                continue
+
+            max_new_tokens = max(item[1] for item in live)
+            max_time = min(item[2] for item in live) - now
+            started = time.perf_counter()
+            try:
+                replies, timed_out = self.model.generate_batch(
+                    [item[0] for item in live], self.prefix, max_new_tokens, max_time)
+            except Exception as e:
+                print(f"Error during generation: {e}")
+                self._failures += len(live)
+                for item in live:
+                    item[4].set_result(None)
+                continue
+            self._generate_total += time.perf_counter() - started
+            self._batches += 1
+            self._rows += len(live)
+
+            for item, reply in zip(live, replies):
+                if timed_out or not reply.strip():
+                    # A cut-off reply is worse than the intent response
+                    self._timeouts += 1
+                    item[4].set_result(None)
+                    continue
+                if self.cache is not None:
+                    self.cache.put(item[3], reply)
+                item[4].set_result(reply)
+
+    def stats(self):
+        batches = self._batches
+        return {
+            'requests': self._requests,
+            'cache_hits': self._cache_hits,
+            'rejected': self._rejected,
+            'timeouts': self._timeouts,
+            'failures': self._failures,
+            'queue_depth': self._queue.qsize(),
+            'batches': batches,
+            'mean_batch_size': self._rows / batches if batches else 0.0,
+            'mean_generate_ms': 1000.0 * self._generate_total / batches if batches else 0.0,
+        }
+
+
+def load_generation_model(backend):
+    """
+    "stub", "tiny" (random tiny T5, for benchmarks) or "transformer"
+    """
+    from utils.streaming import StubSeq2Seq, TransformerSeq2Seq
+    if backend == 'stub':
+        return StubSeq2Seq()
+    if backend == 'tiny':
+        return TransformerSeq2Seq.tiny()
+    return TransformerSeq2Seq()
@@ -0,0 +1,95 @@
+import hashlib
+import json
+
+import numpy as np
+
+from utils.corpus import iter_intents
+
+
+def corpus_manifest(paths):
+    """
+    Content hash of every intent's patterns, keyed by tag.
+
+    Responses are left out: they don't affect the model, so a response-only
+    edit needs no retraining.
+    """
+    hashes = {}
+    for path in paths:
+        for intent in iter_intents(path):
+            h = hashes.setdefault(intent['tag'], hashlib.sha256())
+            for pattern in intent['patterns']:
+                h.update(pattern.encode('utf-8'))
+                h.update(b'\0')
+    return {tag: h.hexdigest() for tag, h in sorted(hashes.items())}
+
+
+def manifest_digest(intents):
+    """
+    One hash over a corpus_manifest, identifying the training data of a
+    published model version
+    """
+    return hashlib.sha256(json.dumps(intents, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def load_manifest(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_manifest(path, intents, words, classes):
+    with open(path, 'w') as f:
+        json.dump({'intents': intents, 'words': len(words), 'classes': len(classes)}, f, indent=4)
+
+
+def diff_manifest(old, new):
+    """
+    Return (added, removed, changed) tag lists between two intent manifests
+    """
+    added = sorted(set(new) - set(old))
+    removed = sorted(set(old) - set(new))
+    changed = sorted(tag for tag in set(old) & set(new) if old[tag] != new[tag])
+    return added, removed, changed
+
+
+def extend_list(old, new):
+    """
+    Keep every existing entry at its index and append unseen ones, so saved
+    weight rows and output units still line up
+    """
+    seen = set(old)
+    return list(old) + [item for item in new if item not in seen]
+
+
+def grow_model(old_model, input_dim, n_classes, seed=0, **build_kwargs):
+    """
+    Rebuild the classifier with a wider input and output layer and copy the
+    trained weights into it.
+
+    New vocabulary words get zero input weights, so the grown model makes
+    exactly the old predictions until fine-tuning; new classes get small
+    random output weights and a zero bias.
+    """
+    from utils.model_builder import build_model
+
+    old_dense = [layer for layer in old_model.layers if layer.get_weights()]
+    hidden = tuple(layer.units for layer in old_dense[:-1])
+    model = build_model(input_dim, n_classes, hidden=hidden, **build_kwargs)
+    new_dense = [layer for layer in model.layers if layer.get_weights()]
+
+    rng = np.random.default_rng(seed)
+    last = len(old_dense) - 1
+    for i, (old_layer, new_layer) in enumerate(zip(old_dense, new_dense)):
+        old_w, old_b = old_layer.get_weights()
+        new_w, new_b = new_layer.get_weights()
+        if i == 0:
+            new_w[:] = 0.0
+        elif i == last:
+            new_w[:] = rng.normal(0.0, 0.01, size=new_w.shape)
+            new_b[:] = 0.0
+        new_w[:old_w.shape[0], :old_w.shape[1]] = old_w
+        new_b[:old_b.shape[0]] = old_b
+        new_layer.set_weights([new_w, new_b])
+    return model
@@ -0,0 +1,345 @@
+import atexit
+import bisect
+import glob
+import heapq
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# A shared snapshot not rewritten for this many flush intervals belongs to
+# a worker that is gone
+STALE_FLUSHES = 3
+
+# Latency buckets in seconds, 100us .. 10s
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram (Prometheus semantics, cumulative on render)
+    """
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self):
+        return {'counts': list(self.counts), 'sum': self.sum, 'count': self.count}
+
+
+class _StageTimer:
+    __slots__ = ('metrics', 'stage', 'start')
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class _RequestTimer(_StageTimer):
+    __slots__ = ()
+
+    def __enter__(self):
+        profiler = self.metrics.profiler
+        if profiler is not None:
+            profiler.begin()
+        return super().__enter__()
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        self.metrics.observe(self.stage, elapsed)
+        profiler = self.metrics.profiler
+        if profiler is not None:
+            profiler.end(elapsed)
+        return False
+
+
+class Metrics:
+    """
+    Per-stage latency histograms and chatbot counters for one process.
+
+    With a shared directory (e.g. METRICS_DIR), each gunicorn worker writes
+    its snapshot there and render() sums every worker's snapshot, so a
+    scrape that lands on any worker sees the whole server. A worker removes
+    its snapshot when it exits; snapshots of dead or silent workers are
+    skipped and removed.
+    """
+
+    def __init__(self, shared_dir=None, flush_interval=5.0, profiler=None):
+        self.shared_dir = shared_dir
+        self.flush_interval = flush_interval
+        self.profiler = profiler
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {
+            'intent': Counter(),
+            'crisis': Counter(),
+            'low_confidence': Counter(),
+            'escalation': Counter(),
+            'generation_fallback': Counter(),
+            'model_swap': Counter(),
+        }
+        self._flusher = None
+        self._flusher_pid = None
+
+    def stage(self, name):
+        """
+        Context manager timing one pipeline stage with a monotonic clock
+        """
+        return _StageTimer(self, name)
+
+    def request(self, name='request'):
+        """
+        Like stage(), but also feeds the slow-request profiler
+        """
+        return _RequestTimer(self, name)
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            hist = self._histograms.get(stage)
+            if hist is None:
+                hist = self._histograms[stage] = Histogram()
+            hist.observe(seconds)
+        self._ensure_flusher()
+
+    def count(self, counter, label='', n=1):
+        with self._lock:
+            self._counters[counter][label] += n
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'histograms': {k: v.snapshot() for k, v in self._histograms.items()},
+                'counters': {k: dict(v) for k, v in self._counters.items()},
+            }
+
+    def _ensure_flusher(self):
+        if self.shared_dir is None:
+            return
+        if self._flusher is not None and self._flusher_pid == os.getpid():
+            return
+        # Started lazily so each forked worker gets its own thread
+        self._flusher_pid = os.getpid()
+        self._flusher = threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True)
+        self._flusher.start()
+        atexit.register(self._remove_snapshot, os.getpid())
+
+    def _snapshot_path(self, pid):
+        return os.path.join(self.shared_dir, f'worker-{pid}.json')
+
+    def _remove_snapshot(self, pid):
+        # atexit handlers are inherited across fork; only the owner removes
+        if pid != os.getpid():
+            return
+        try:
+            os.remove(self._snapshot_path(pid))
+        except OSError:
+            pass
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"Error writing metrics snapshot: {e}")
+
+    def flush(self):
+        """
+        Write this worker's snapshot into the shared directory atomically
+        """
+        os.makedirs(self.shared_dir, exist_ok=True)
+        path = self._snapshot_path(os.getpid())
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, path)
+
+    def _collect(self):
+        if self.shared_dir is None:
+            return [self.snapshot()]
+        self.flush()
+        snapshots = []
+        oldest = time.time() - STALE_FLUSHES * self.flush_interval
+        for path in glob.glob(os.path.join(self.shared_dir, 'worker-*.json')):
+            pid = os.path.basename(path)[len('worker-'):-len('.json')]
+            try:
+                if not _alive(int(pid)) or os.path.getmtime(path) < oldest:
+                    # A killed worker's last snapshot, or one whose PID was reused
+                    os.remove(path)
+                    continue
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def render(self, extra_gauges=None):
+        """
+        All metrics in the Prometheus text exposition format
+        """
+        histograms = {}
+        counters = {}
+        for snap in self._collect():
+            for stage, h in snap['histograms'].items():
+                agg = histograms.setdefault(stage, {'counts': [0] * (len(DEFAULT_BUCKETS) + 1), 'sum': 0.0, 'count': 0})
+                agg['counts'] = [a + b for a, b in zip(agg['counts'], h['counts'])]
+                agg['sum'] += h['sum']
+                agg['count'] += h['count']
+            for name, values in snap['counters'].items():
+                agg = counters.setdefault(name, Counter())
+                agg.update(values)
+
+        lines = [
+            '# HELP chatbot_stage_seconds Time spent in each request pipeline stage',
+            '# TYPE chatbot_stage_seconds histogram',
+        ]
+        for stage, h in sorted(histograms.items()):
+            cumulative = 0
+            for bound, n in zip(DEFAULT_BUCKETS, h['counts']):
+                cumulative += n
+                lines.append(f'chatbot_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'chatbot_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {h["count"]}')
+            lines.append(f'chatbot_stage_seconds_sum{{stage="{stage}"}} {h["sum"]}')
+            lines.append(f'chatbot_stage_seconds_count{{stage="{stage}"}} {h["count"]}')
+
+        lines += [
+            '# HELP chatbot_intent_total Top predicted intent per message',
+            '# TYPE chatbot_intent_total counter',
+        ]
+        for intent, n in sorted(counters.get('intent', {}).items()):
+            lines.append(f'chatbot_intent_total{{intent="{_escape(intent)}"}} {n}')
+
+        lines += [
+            '# HELP chatbot_low_confidence_total Messages with no intent above ERROR_THRESHOLD',
+            '# TYPE chatbot_low_confidence_total counter',
+            f'chatbot_low_confidence_total {sum(counters.get("low_confidence", {}).values())}',
+            '# HELP chatbot_crisis_total Crisis lexicon hits by severity',
+            '# TYPE chatbot_crisis_total counter',
+        ]
+        for severity, n in sorted(counters.get('crisis', {}).items()):
+            lines.append(f'chatbot_crisis_total{{severity="{_escape(severity)}"}} {n}')
+        lines += [
+            '# HELP chatbot_escalation_total Sessions pointed to crisis resources after repeated distress intents',
+            '# TYPE chatbot_escalation_total counter',
+            f'chatbot_escalation_total {sum(counters.get("escalation", {}).values())}',
+            '# HELP chatbot_generation_fallback_total Advanced requests answered with the intent response',
+            '# TYPE chatbot_generation_fallback_total counter',
+            f'chatbot_generation_fallback_total {sum(counters.get("generation_fallback", {}).values())}',
+            '# HELP chatbot_model_swap_total Model versions swapped in without a restart',
+            '# TYPE chatbot_model_swap_total counter',
+            f'chatbot_model_swap_total {sum(counters.get("model_swap", {}).values())}',
+        ]
+
+        for name, (help_text, value) in sorted((extra_gauges or {}).items()):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} gauge', f'{name} {value}']
+        return '\n'.join(lines) + '\n'
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class SlowRequestProfiler:
+    """
+    Sampling profiler that keeps folded stacks for the slowest N requests.
+
+    A background thread samples the stacks of threads currently inside a
+    request every interval seconds. When a request finishes, its samples are
+    kept only if it is among the top_n slowest seen so far. dump() returns
+    them in the folded "frame;frame;frame count" format that flamegraph.pl
+    and speedscope read.
+    """
+
+    def __init__(self, top_n=10, interval=0.005):
+        self.top_n = top_n
+        self.interval = interval
+        self._active = {}
+        self._slowest = []  # min-heap of (seconds, seq, Counter of stacks)
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_sampler(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._sample_loop, name='slow-request-profiler', daemon=True)
+        self._thread.start()
+
+    def begin(self):
+        self._ensure_sampler()
+        with self._lock:
+            self._active[threading.get_ident()] = Counter()
+
+    def end(self, seconds):
+        with self._lock:
+            stacks = self._active.pop(threading.get_ident(), None)
+            if not stacks:
+                return
+            self._seq += 1
+            entry = (seconds, self._seq, stacks)
+            if len(self._slowest) < self.top_n:
+                heapq.heappush(self._slowest, entry)
+            elif seconds > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    def _sample_loop(self):
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, stacks in self._active.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        stacks[_fold(frame)] += 1
+
+    def dump(self):
+        with self._lock:
+            entries = sorted(self._slowest, reverse=True)
+        lines = []
+        for seconds, seq, stacks in entries:
+            root = f'request_{seq}_{1000.0 * seconds:.1f}ms'
+            for stack, n in stacks.items():
+                lines.append(f'{root};{stack} {n}')
+        return '\n'.join(lines) + '\n'
+
+
+def _fold(frame):
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+        frame = frame.f_back
+    return ';'.join(reversed(parts))
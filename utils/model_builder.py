@@ -0,0 +1,22 @@
+def build_model(input_dim, n_classes, hidden=(128, 64), dropout=0.5, learning_rate=0.01):
+    """
+    The intent classifier: Dense-ReLU layers with dropout and a softmax
+    output, compiled for integer labels
+    """
+    import tensorflow as tf
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import Dense, Dropout
+
+    model = Sequential()
+    for i, units in enumerate(hidden):
+        if i == 0:
+            model.add(Dense(units, input_shape=(input_dim,), activation='relu'))
+        else:
+            model.add(Dense(units, activation='relu'))
+        model.add(Dropout(dropout))
+    model.add(Dense(n_classes, activation='softmax'))
+
+    optimizer = tf.keras.optimizers.Adam(learning_rate=learning_rate)
+    # Integer labels, so the sparse form of categorical cross-entropy
+    model.compile(loss='sparse_categorical_crossentropy', optimizer=optimizer, metrics=['accuracy'])
+    return model
@@ -0,0 +1,98 @@
+import numpy as np
+
+
+def dense_layers(model):
+    """
+    (kernel, bias) float32 pairs of every Dense layer of a Keras model.
+
+    Dropout layers carry no weights and are a no-op at inference time.
+    """
+    return [
+        (weights[0].astype(np.float32), weights[1].astype(np.float32))
+        for weights in (layer.get_weights() for layer in model.layers)
+        if weights
+    ]
+
+
+def export_weights(model, path):
+    """
+    Write the Dense layer weights of a trained Keras model to a .npz file
+    """
+    arrays = {}
+    for n, (kernel, bias) in enumerate(dense_layers(model)):
+        arrays[f'W{n}'] = kernel
+        arrays[f'b{n}'] = bias
+    np.savez_compressed(path, **arrays)
+    return path
+
+
+def _relu(x):
+    return np.maximum(x, 0.0, out=x)
+
+
+def _softmax(x):
+    x = x - x.max(axis=-1, keepdims=True)
+    np.exp(x, out=x)
+    x /= x.sum(axis=-1, keepdims=True)
+    return x
+
+
+class NumpyIntentModel:
+    """
+    Pure-NumPy forward pass for the Dense-ReLU-Dense-ReLU-Dense-softmax
+    intent classifier built by train_model.py
+    """
+
+    def __init__(self, path=None, layers=None):
+        if layers is not None:
+            # e.g. read-only views into a memory-mapped artifact bundle
+            self.layers = list(layers)
+            return
+        with np.load(path) as data:
+            n = len([k for k in data.files if k.startswith('W')])
+            self.layers = [
+                (np.ascontiguousarray(data[f'W{i}'], dtype=np.float32),
+                 np.ascontiguousarray(data[f'b{i}'], dtype=np.float32))
+                for i in range(n)
+            ]
+
+    @property
+    def input_dim(self):
+        return self.layers[0][0].shape[0]
+
+    @property
+    def output_dim(self):
+        return self.layers[-1][0].shape[1]
+
+    def predict(self, x, verbose=0):
+        """
+        Same call shape as keras Model.predict: (batch, vocab) -> (batch, classes)
+        """
+        h = np.asarray(x, dtype=np.float32)
+        if h.ndim == 1:
+            h = h[np.newaxis, :]
+        last = len(self.layers) - 1
+        for i, (W, b) in enumerate(self.layers):
+            h = h @ W
+            h += b
+            if i < last:
+                _relu(h)
+        return _softmax(h)
+
+    def predict_sparse(self, rows):
+        """
+        Forward pass for 0/1 inputs given as lists of active column indices.
+
+        The first Dense layer only needs the weight rows of the active words,
+        so its cost scales with the message length instead of the vocabulary.
+        """
+        W0, b0 = self.layers[0]
+        h = np.empty((len(rows), W0.shape[1]), dtype=np.float32)
+        for i, columns in enumerate(rows):
+            np.sum(W0[columns], axis=0, out=h[i])
+        h += b0
+        for W, b in self.layers[1:]:
+            _relu(h)
+            h = h @ W
+            h += b
+        return _softmax(h)
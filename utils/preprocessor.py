@@ -0,0 +1,113 @@
+import pickle
+
+import numpy as np
+
+# NLTK is imported on first use, not when the app imports this module
+_word_tokenize = None
+_lemmatize = None
+
+# Optional utils.text_engine.TextPreprocessor used instead of NLTK
+_text_engine = None
+
+# Indexes built on the fly for vocabularies that were not loaded from disk,
+# keyed by id() with the list kept alive so the id cannot be reused
+_index_cache = {}
+
+
+def _load_nltk():
+    global _word_tokenize, _lemmatize
+    import nltk
+    from nltk.stem import WordNetLemmatizer
+    _word_tokenize = nltk.word_tokenize
+    _lemmatize = WordNetLemmatizer().lemmatize
+
+
+def set_text_engine(engine):
+    """
+    Route clean_up_sentence through engine, or back to NLTK with None
+    """
+    global _text_engine
+    _text_engine = engine
+
+
+def clean_up_sentence(sentence):
+    """
+    Tokenize and lemmatize a sentence the same way train_model.py does
+    """
+    if _text_engine is not None:
+        return _text_engine.clean_up_sentence(sentence)
+    if _lemmatize is None:
+        _load_nltk()
+    sentence_words = _word_tokenize(sentence)
+    sentence_words = [_lemmatize(word.lower()) for word in sentence_words]
+    return sentence_words
+
+
+def build_word_index(words):
+    """
+    Map each vocabulary word to its column in the bag-of-words vector
+    """
+    return {word: i for i, word in enumerate(words)}
+
+
+def save_word_index(word_index, path):
+    with open(path, 'wb') as f:
+        pickle.dump(word_index, f)
+
+
+def load_word_index(path, words=None):
+    """
+    Load the word->column index saved next to words.pkl, or build it from
+    words if the file is missing (artifacts from an older training run)
+    """
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        if words is None:
+            raise
+        return build_word_index(words)
+
+
+def _get_index(words, word_index):
+    if word_index is not None:
+        return word_index
+    cached = _index_cache.get(id(words))
+    if cached is None or cached[0] is not words:
+        cached = (words, build_word_index(words))
+        _index_cache[id(words)] = cached
+    return cached[1]
+
+
+def sparse_bag_of_words(sentence, words, word_index=None):
+    """
+    Sorted column indices of the vocabulary words present in the sentence.
+
+    Only the message's own tokens are looked up, so the cost is
+    O(|tokens|) instead of O(|vocab| x |tokens|).
+    """
+    return lemmas_to_columns(clean_up_sentence(sentence), _get_index(words, word_index))
+
+
+def lemmas_to_columns(lemmas, word_index):
+    """
+    Sorted column indices for an already lemmatized sentence, e.g. one
+    tokenized in a worker process
+    """
+    columns = {word_index[w] for w in lemmas if w in word_index}
+    return np.fromiter(sorted(columns), dtype=np.int64, count=len(columns))
+
+
+def bag_of_words(sentence, words, word_index=None, out=None):
+    """
+    Dense 0/1 bag-of-words vector over the vocabulary.
+
+    Pass a preallocated out buffer of len(words) to reuse it across calls
+    instead of allocating a new vector per message.
+    """
+    if out is None:
+        out = np.zeros(len(words), dtype=np.float32)
+    else:
+        out.fill(0)
+    out[sparse_bag_of_words(sentence, words, word_index)] = 1
+    return out
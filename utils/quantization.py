@@ -0,0 +1,103 @@
+import numpy as np
+
+from utils.numpy_model import _relu, _softmax
+
+
+def quantize_kernel(kernel):
+    """
+    Symmetric per-output-channel int8 quantization of a Dense kernel.
+
+    Returns (q, scale) with kernel ~= q * scale, q int8 in [-127, 127] and
+    one float32 scale per output unit.
+    """
+    peak = np.abs(kernel).max(axis=0)
+    scale = np.where(peak > 0, peak / 127.0, 1.0).astype(np.float32)
+    q = np.clip(np.rint(kernel / scale), -127, 127).astype(np.int8)
+    return q, scale
+
+
+def quantize_layers(layers):
+    """
+    (q, scale, bias) triples for the float32 (kernel, bias) pairs of
+    utils.numpy_model.dense_layers
+    """
+    return [quantize_kernel(kernel) + (np.asarray(bias, dtype=np.float32),) for kernel, bias in layers]
+
+
+def export_quantized(layers, path):
+    """
+    Write int8 kernels, their per-channel scales and float32 biases to a .npz file
+    """
+    arrays = {}
+    for n, (q, scale, bias) in enumerate(quantize_layers(layers)):
+        arrays[f'Q{n}'] = q
+        arrays[f's{n}'] = scale
+        arrays[f'b{n}'] = bias
+    np.savez_compressed(path, **arrays)
+    return path
+
+
+class QuantizedIntentModel:
+    """
+    NumPy forward pass over int8 weights with per-channel scales.
+
+    The first layer (vocabulary x 128) holds nearly all the weights and
+    stays int8: with 0/1 bag-of-words inputs it is a gather of the active
+    rows summed exactly in int32, then one multiply by the scales. The
+    hidden layers are a few KB and are dequantized to float32 at load.
+    """
+
+    def __init__(self, path=None, layers=None):
+        if layers is None:
+            with np.load(path) as data:
+                n = len([k for k in data.files if k.startswith('Q')])
+                layers = [(data[f'Q{i}'], data[f's{i}'], data[f'b{i}']) for i in range(n)]
+        q0, s0, b0 = layers[0]
+        self.q0 = np.ascontiguousarray(q0, dtype=np.int8)
+        self.s0 = np.asarray(s0, dtype=np.float32)
+        self.b0 = np.asarray(b0, dtype=np.float32)
+        self.hidden = [(q.astype(np.float32) * s, np.asarray(b, dtype=np.float32))
+                       for q, s, b in layers[1:]]
+
+    @property
+    def input_dim(self):
+        return self.q0.shape[0]
+
+    @property
+    def output_dim(self):
+        return self.hidden[-1][0].shape[1] if self.hidden else self.q0.shape[1]
+
+    @property
+    def nbytes(self):
+        return (self.q0.nbytes + self.s0.nbytes + self.b0.nbytes
+                + sum(W.nbytes + b.nbytes for W, b in self.hidden))
+
+    def _head(self, h):
+        h *= self.s0
+        h += self.b0
+        for W, b in self.hidden:
+            _relu(h)
+            h = h @ W
+            h += b
+        return _softmax(h)
+
+    def predict(self, x, verbose=0):
+        """
+        Same call shape as keras Model.predict: (batch, vocab) -> (batch, classes)
+        """
+        x = np.asarray(x, dtype=np.float32)
+        if x.ndim == 1:
+            x = x[np.newaxis, :]
+        # Only the columns some row uses take part in the first matmul
+        active = np.flatnonzero(x.any(axis=0))
+        h = x[:, active] @ self.q0[active].astype(np.float32)
+        return self._head(h)
+
+    def predict_sparse(self, rows):
+        """
+        Forward pass for 0/1 inputs given as lists of active column indices
+        """
+        h = np.empty((len(rows), self.q0.shape[1]), dtype=np.float32)
+        for i, columns in enumerate(rows):
+            h[i] = self.q0[columns].sum(axis=0, dtype=np.int32)
+        return self._head(h)
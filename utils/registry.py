@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+METADATA = 'metadata.json'
+
+
+class RegistryError(Exception):
+    pass
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _replace_file(path, text):
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class ArtifactRegistry:
+    """
+    Versioned model artifacts in a directory shared by training and serving.
+
+    Each published version lives in root/versions/<version>/: the artifact
+    files plus metadata.json (version, publish time, the training corpus
+    manifest hash and a SHA-256 per file). root/CURRENT names the version
+    the app should serve. A version is copied into a temporary directory
+    and renamed into place, and CURRENT is replaced atomically, so readers
+    never see a half-written version. Old versions stay for rollback until
+    prune() removes them.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.versions_dir = os.path.join(root, 'versions')
+        os.makedirs(self.versions_dir, exist_ok=True)
+
+    def publish(self, files, version=None, manifest_hash=None, activate=True):
+        """
+        Copy files ({name: source path}) in as a new version and return its
+        id; with activate, also make it CURRENT
+        """
+        base = version or time.strftime('%Y%m%d%H%M%S')
+        version, n = base, 0
+        while os.path.exists(os.path.join(self.versions_dir, version)):
+            n += 1
+            version = f'{base}-{n}'
+
+        tmp = os.path.join(self.versions_dir, f'.{version}.{os.getpid()}.tmp')
+        os.makedirs(tmp)
+        try:
+            hashes = {}
+            for name, source in files.items():
+                shutil.copyfile(source, os.path.join(tmp, name))
+                hashes[name] = _sha256(os.path.join(tmp, name))
+            metadata = {'version': version, 'published': time.time(), 'manifest_hash': manifest_hash,
+                        'files': hashes}
+            with open(os.path.join(tmp, METADATA), 'w') as f:
+                json.dump(metadata, f, indent=4)
+            os.rename(tmp, os.path.join(self.versions_dir, version))
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        if activate:
+            self.set_current(version)
+        return version
+
+    def metadata(self, version):
+        try:
+            with open(os.path.join(self.versions_dir, version, METADATA)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise RegistryError(f"unknown model version {version!r}") from None
+
+    def versions(self):
+        """
+        Metadata of every published version, oldest first
+        """
+        found = []
+        for name in os.listdir(self.versions_dir):
+            if not name.startswith('.') and os.path.exists(os.path.join(self.versions_dir, name, METADATA)):
+                found.append(self.metadata(name))
+        return sorted(found, key=lambda m: (m['published'], m['version']))
+
+    def current(self):
+        """
+        The version named by CURRENT, or None before the first publish
+        """
+        try:
+            with open(os.path.join(self.root, 'CURRENT')) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def set_current(self, version):
+        self.metadata(version)
+        _replace_file(os.path.join(self.root, 'CURRENT'), version + '\n')
+
+    def previous(self, version):
+        """
+        The version published just before version, for rollback
+        """
+        ids = [m['version'] for m in self.versions()]
+        if version not in ids or ids.index(version) == 0:
+            raise RegistryError(f"no version published before {version!r}")
+        return ids[ids.index(version) - 1]
+
+    def path(self, version, name):
+        return os.path.join(self.versions_dir, version, name)
+
+    def verify(self, version):
+        """
+        Check every file of version against its published hash
+        """
+        for name, digest in self.metadata(version)['files'].items():
+            if _sha256(self.path(version, name)) != digest:
+                raise RegistryError(f"{name} of model version {version} failed its integrity check")
+
+    def prune(self, keep):
+        """
+        Delete all but the keep newest versions, never the current one;
+        returns the versions removed
+        """
+        current = self.current()
+        old = [m['version'] for m in self.versions()][:-keep] if keep > 0 else []
+        removed = [v for v in old if v != current]
+        for version in removed:
+            shutil.rmtree(os.path.join(self.versions_dir, version), ignore_errors=True)
+        return removed
+
+
+class RegistryWatcher:
+    """
+    Poll the registry's CURRENT file and call on_change(version) from a
+    background thread whenever it names a version other than the one
+    being served.
+
+    on_change does the loading, warming and swapping. A version that fails
+    to load is not retried until CURRENT changes again.
+    """
+
+    def __init__(self, registry, on_change, interval=5.0, served=None):
+        self.registry = registry
+        self.on_change = on_change
+        self.interval = interval
+        self.served = served
+        self.failed = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def ensure_started(self):
+        # Threads do not survive a fork, so each gunicorn worker polls for itself
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='registry-watcher', daemon=True)
+            self._thread.start()
+
+    def check(self):
+        """
+        One poll; returns the version swapped to, if any
+        """
+        version = self.registry.current()
+        if version is None or version in (self.served, self.failed):
+            return None
+        try:
+            self.on_change(version)
+        except Exception as e:
+            print(f"Error loading model version {version}: {e}")
+            self.failed = version
+            return None
+        self.served = version
+        self.failed = None
+        return version
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.check()
@@ -0,0 +1,54 @@
+import json
+import random
+from types import MappingProxyType
+
+
+class ResponseTable:
+    """
+    Immutable tag -> responses table compiled once from the intents JSON.
+
+    Lookups are a single dict access, independent of the number of intents.
+    A reload builds a new table and swaps the reference, so requests already
+    holding the old table finish with it unchanged.
+    """
+
+    def __init__(self, intents_json):
+        self._responses = MappingProxyType({
+            intent['tag']: tuple(intent['responses'])
+            for intent in intents_json['intents']
+            if intent.get('responses')
+        })
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, 'r') as f:
+            return cls(json.load(f))
+
+    def __contains__(self, tag):
+        return tag in self._responses
+
+    def __len__(self):
+        return len(self._responses)
+
+    def tags(self):
+        return self._responses.keys()
+
+    def responses(self, tag):
+        return self._responses.get(tag, ())
+
+    def choose(self, tag, avoid=None):
+        """
+        Random response for tag, or None for an unknown tag.
+
+        If avoid is given and the intent has other responses, a different one
+        is picked so the same line is not repeated twice in a row.
+        """
+        options = self._responses.get(tag)
+        if not options:
+            return None
+        if avoid is None or len(options) == 1:
+            return random.choice(options)
+        i = random.randrange(len(options) - 1)
+        if options[i] == avoid:
+            i = len(options) - 1
+        return options[i]
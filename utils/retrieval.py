@@ -0,0 +1,190 @@
+import zlib
+
+import numpy as np
+
+from utils.dataset import IGNORE_LETTERS
+
+
+class HashedNgramEmbedder:
+    """
+    Signed feature hashing of lemmas and their character n-grams into a
+    fixed-size, L2-normalized float32 vector.
+
+    Needs no model download. Character n-grams give words that are not in
+    the training vocabulary ("anxiousness", "overthinking") partial matches
+    with the patterns that share their stems.
+    """
+
+    def __init__(self, dim=1024, ngram_range=(3, 5), max_memo=100000):
+        if dim & (dim - 1):
+            raise ValueError("dim must be a power of two")
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.max_memo = max_memo
+        self._memo = {}
+
+    def _features(self, lemma):
+        features = self._memo.get(lemma)
+        if features is not None:
+            return features
+        grams = ['w:' + lemma]
+        padded = f'<{lemma}>'
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            grams.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+        hashes = np.fromiter((zlib.crc32(g.encode('utf-8')) for g in grams), dtype=np.uint32, count=len(grams))
+        indices = (hashes & (self.dim - 1)).astype(np.int64)
+        # The top bit picks the sign, so collisions cancel out on average
+        signs = np.where(hashes >> 31, -1.0, 1.0).astype(np.float32)
+        # The whole word carries as much weight (L2) as all its n-grams together
+        signs[0] *= np.sqrt(max(len(grams) - 1, 1))
+        features = (indices, signs)
+        if len(self._memo) >= self.max_memo:
+            self._memo.clear()
+        self._memo[lemma] = features
+        return features
+
+    def embed(self, lemma_lists):
+        """
+        (len(lemma_lists), dim) contiguous float32 matrix of unit rows (zero
+        rows for messages with no tokens)
+        """
+        out = np.zeros((len(lemma_lists), self.dim), dtype=np.float32)
+        for i, lemmas in enumerate(lemma_lists):
+            for lemma in lemmas:
+                if lemma in IGNORE_LETTERS:
+                    continue
+                indices, signs = self._features(lemma)
+                np.add.at(out[i], indices, signs)
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
+
+
+class IVFIndex:
+    """
+    Approximate inner-product search: patterns are clustered by spherical
+    k-means and a query only scores the patterns of its n_probe closest
+    clusters.
+
+    order lists the pattern rows grouped by cluster, so once the caller
+    stores its matrix in that order each cluster is a contiguous slice
+    offsets[c]:offsets[c + 1].
+    """
+
+    def __init__(self, matrix, n_lists, n_probe=8, iterations=10, seed=0):
+        rng = np.random.default_rng(seed)
+        n_lists = min(n_lists, len(matrix))
+        centroids = matrix[rng.choice(len(matrix), n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(matrix @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, matrix)
+            # Clusters that lost all their members keep their old centroid
+            empty = np.bincount(assignment, minlength=n_lists) == 0
+            sums[empty] = centroids[empty]
+            centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+        assignment = np.argmax(matrix @ centroids.T, axis=1)
+        self.centroids = centroids.astype(np.float32)
+        self.order = np.argsort(assignment, kind='stable')
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=n_lists))])
+        self.n_probe = min(n_probe, n_lists)
+
+    def probes(self, query):
+        """
+        (start, stop) row ranges of the clusters closest to query
+        """
+        closest = np.argpartition(-(self.centroids @ query), self.n_probe - 1)[:self.n_probe]
+        return [(self.offsets[c], self.offsets[c + 1]) for c in closest]
+
+
+class PatternIndex:
+    """
+    Every intent pattern embedded once into a contiguous float32 matrix.
+
+    Intent scores for a message are the best cosine similarity between the
+    message and any pattern of that intent: one matrix product over all
+    patterns, which are stored grouped by intent so the per-intent maximum
+    is a single reduceat. For very large pattern sets, ann_lists > 0 builds
+    an IVFIndex and only its probed clusters are scored. Same call shape as
+    the model backends' predict_sparse, but it takes lemma lists instead of
+    vocabulary columns.
+    """
+
+    def __init__(self, matrix, pattern_classes, classes, embedder=None, ann_lists=0, ann_probe=8):
+        matrix = np.asarray(matrix, dtype=np.float32)
+        pattern_classes = np.asarray(pattern_classes, dtype=np.int64)
+        self.classes = list(classes)
+        self.embedder = embedder or HashedNgramEmbedder(dim=matrix.shape[1])
+        self.ann = IVFIndex(matrix, ann_lists, ann_probe) if ann_lists else None
+        order = self.ann.order if self.ann is not None else np.argsort(pattern_classes, kind='stable')
+        self.matrix = np.ascontiguousarray(matrix[order])
+        self.pattern_classes = pattern_classes[order]
+        if self.ann is None:
+            # Start row and intent of each run of same-intent patterns
+            self._starts = np.flatnonzero(np.diff(self.pattern_classes, prepend=-1))
+            self._start_classes = self.pattern_classes[self._starts]
+
+    @classmethod
+    def build(cls, documents, classes, embedder=None, **kwargs):
+        """
+        Index (lemmas, tag) documents, e.g. from utils.dataset.iter_documents
+        """
+        embedder = embedder or HashedNgramEmbedder()
+        class_index = {tag: i for i, tag in enumerate(classes)}
+        lemma_lists, pattern_classes = [], []
+        for lemmas, tag in documents:
+            lemma_lists.append(lemmas)
+            pattern_classes.append(class_index[tag])
+        return cls(embedder.embed(lemma_lists), pattern_classes, classes, embedder, **kwargs)
+
+    def save(self, path):
+        np.savez(path, matrix=self.matrix, pattern_classes=self.pattern_classes,
+                 classes=np.array(self.classes), ngram_range=np.array(self.embedder.ngram_range))
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        with np.load(path) as data:
+            embedder = HashedNgramEmbedder(dim=data['matrix'].shape[1],
+                                           ngram_range=tuple(int(n) for n in data['ngram_range']))
+            return cls(data['matrix'], data['pattern_classes'], data['classes'].tolist(), embedder, **kwargs)
+
+    @property
+    def output_dim(self):
+        return len(self.classes)
+
+    def _scored_rows(self, query):
+        """
+        (row indices, similarities) over the rows searched for query
+        """
+        if self.ann is None:
+            return np.arange(len(self.matrix)), self.matrix @ query
+        ranges = self.ann.probes(query)
+        rows = np.concatenate([np.arange(start, stop) for start, stop in ranges])
+        scores = np.concatenate([self.matrix[start:stop] @ query for start, stop in ranges])
+        return rows, scores
+
+    def search(self, lemmas, k=5):
+        """
+        (row indices into self.matrix, similarities) of the k most similar patterns
+        """
+        rows, scores = self._scored_rows(self.embedder.embed([lemmas])[0])
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return rows[top], scores[top]
+
+    def predict_lemmas(self, lemma_lists):
+        """
+        (len(lemma_lists), len(classes)) best similarity per intent
+        """
+        queries = self.embedder.embed(lemma_lists)
+        out = np.zeros((len(lemma_lists), len(self.classes)), dtype=np.float32)
+        if self.ann is None:
+            best = np.maximum.reduceat(queries @ self.matrix.T, self._starts, axis=1)
+            out[:, self._start_classes] = np.maximum(best, 0)
+        else:
+            for i, query in enumerate(queries):
+                rows, scores = self._scored_rows(query)
+                np.maximum.at(out[i], self.pattern_classes[rows], scores)
+        return out
@@ -0,0 +1,266 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+# Intents kept per session
+HISTORY = 8
+
+# Tags are stored as small integer codes; -1 marks a low-confidence turn.
+# The table only grows, so codes stay valid across model reloads.
+_tag_codes = {}
+_tag_names = []
+_tag_lock = threading.Lock()
+
+
+def _code(tag):
+    if tag is None:
+        return -1
+    code = _tag_codes.get(tag)
+    if code is None:
+        with _tag_lock:
+            code = _tag_codes.get(tag)
+            if code is None:
+                code = _tag_codes[tag] = len(_tag_names)
+                _tag_names.append(tag)
+    return code
+
+
+def _name(code):
+    return None if code < 0 else _tag_names[code]
+
+
+class SessionState:
+    """
+    Ring buffer of a session's last HISTORY intents and confidences, plus
+    the last response sent, in fixed-size array-backed slots. distress
+    counts the most recent consecutive distress turns, without the
+    HISTORY cap.
+    """
+
+    __slots__ = ('tags', 'confidences', 'turns', 'last_seen', 'last_tag', 'last_response', 'distress')
+
+    def __init__(self):
+        self.tags = array('h', [-1]) * HISTORY
+        self.confidences = array('f', [0.0]) * HISTORY
+        self.turns = 0
+        self.last_seen = 0.0
+        self.last_tag = -1
+        self.last_response = None
+        self.distress = 0
+
+    def add(self, tag, confidence, response=None, now=None, distress=False):
+        slot = self.turns % HISTORY
+        self.tags[slot] = _code(tag)
+        self.confidences[slot] = confidence
+        self.turns += 1
+        self.last_seen = time.time() if now is None else now
+        self.distress = self.distress + 1 if distress else 0
+        if response is not None:
+            self.last_tag = self.tags[slot]
+            self.last_response = response
+
+    def history(self):
+        """
+        (tag, confidence) pairs, oldest first; tag is None for low-confidence turns
+        """
+        n = min(self.turns, HISTORY)
+        slots = [(self.turns - n + i) % HISTORY for i in range(n)]
+        return [(_name(self.tags[s]), self.confidences[s]) for s in slots]
+
+    def response_for(self, tag):
+        """
+        The last response sent, if it was for tag
+        """
+        return self.last_response if self.last_tag == _code(tag) else None
+
+    def to_json(self):
+        # Tag names rather than codes, which are only valid in this process
+        return json.dumps({'tags': [_name(c) for c in self.tags], 'confidences': self.confidences.tolist(),
+                           'turns': self.turns, 'last_tag': _name(self.last_tag),
+                           'last_response': self.last_response, 'distress': self.distress})
+
+    @classmethod
+    def from_json(cls, text, last_seen):
+        data = json.loads(text)
+        state = cls()
+        state.tags = array('h', [_code(tag) for tag in data['tags']])
+        state.confidences = array('f', data['confidences'])
+        state.turns = data['turns']
+        state.last_seen = last_seen
+        state.last_tag = _code(data['last_tag'])
+        state.last_response = data['last_response']
+        state.distress = data.get('distress', 0)
+        return state
+
+
+def session_sizeof():
+    """
+    Approximate bytes one session costs in SessionStore, excluding the
+    response string, which is shared with the response table
+    """
+    state = SessionState()
+    key = 'x' * 36
+    # Plus an OrderedDict entry: hash table slot and linked-list node
+    return (sys.getsizeof(state) + sys.getsizeof(state.tags) + sys.getsizeof(state.confidences)
+            + sys.getsizeof(state.last_seen) + sys.getsizeof(key) + 100)
+
+
+class SessionStore:
+    """
+    In-process session states, least recently used evicted first.
+
+    Sessions idle for longer than idle_timeout seconds are dropped, and the
+    number of sessions is capped by max_sessions and by max_bytes (estimated
+    with session_sizeof). State is per worker process.
+    """
+
+    def __init__(self, max_sessions=100000, idle_timeout=1800.0, max_bytes=None):
+        if max_bytes is not None:
+            max_sessions = min(max_sessions, max(1, max_bytes // session_sizeof()))
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def get(self, session_id):
+        """
+        The session's state, or None if it is unknown or has gone idle
+        """
+        now = time.time()
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None:
+                return None
+            if self.idle_timeout and now - state.last_seen > self.idle_timeout:
+                del self._sessions[session_id]
+                self.evictions += 1
+                return None
+            self._sessions.move_to_end(session_id)
+            return state
+
+    def record(self, session_id, tag, confidence, response=None, distress=False):
+        now = time.time()
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None or (self.idle_timeout and now - state.last_seen > self.idle_timeout):
+                state = self._sessions[session_id] = SessionState()
+            state.add(tag, confidence, response, now, distress)
+            self._sessions.move_to_end(session_id)
+            self._evict(now)
+        return state
+
+    def _evict(self, now):
+        sessions = self._sessions
+        while len(sessions) > self.max_sessions:
+            sessions.popitem(last=False)
+            self.evictions += 1
+        # Oldest first, so idle sessions are all at the front
+        while sessions and self.idle_timeout:
+            state = next(iter(sessions.values()))
+            if now - state.last_seen <= self.idle_timeout:
+                break
+            sessions.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {'backend': 'memory', 'sessions': len(self._sessions), 'max_sessions': self.max_sessions,
+                    'approx_bytes': len(self._sessions) * session_sizeof(), 'evictions': self.evictions}
+
+
+class SQLiteSessionStore:
+    """
+    Session states in a local SQLite file, shared by every worker process
+    on the host.
+
+    Same interface as SessionStore. Idle and excess sessions are pruned
+    every prune_every writes.
+    """
+
+    def __init__(self, path, max_sessions=100000, idle_timeout=1800.0, prune_every=1000):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._writes = 0
+        self.evictions = 0
+        with self._connection() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS sessions '
+                       '(id TEXT PRIMARY KEY, state TEXT NOT NULL, last_seen REAL NOT NULL)')
+            db.execute('CREATE INDEX IF NOT EXISTS sessions_last_seen ON sessions (last_seen)')
+
+    def _connection(self):
+        db = getattr(self._local, 'db', None)
+        # One connection per thread, never reused across a fork; WAL lets
+        # readers run during writes
+        if db is None or self._local.pid != os.getpid():
+            db = self._local.db = sqlite3.connect(self.path, timeout=5.0)
+            self._local.pid = os.getpid()
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+        return db
+
+    def __len__(self):
+        return self._connection().execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+
+    def _load(self, db, session_id, now):
+        row = db.execute('SELECT state, last_seen FROM sessions WHERE id = ?', (session_id,)).fetchone()
+        if row is None or (self.idle_timeout and now - row[1] > self.idle_timeout):
+            return None
+        return SessionState.from_json(row[0], row[1])
+
+    def get(self, session_id):
+        return self._load(self._connection(), session_id, time.time())
+
+    def record(self, session_id, tag, confidence, response=None, distress=False):
+        now = time.time()
+        db = self._connection()
+        with db:
+            db.execute('BEGIN IMMEDIATE')
+            state = self._load(db, session_id, now) or SessionState()
+            state.add(tag, confidence, response, now, distress)
+            db.execute('INSERT OR REPLACE INTO sessions (id, state, last_seen) VALUES (?, ?, ?)',
+                       (session_id, state.to_json(), now))
+        self._writes += 1
+        if self._writes % self.prune_every == 0:
+            self.prune(now)
+        return state
+
+    def prune(self, now=None):
+        now = time.time() if now is None else now
+        db = self._connection()
+        with db:
+            removed = 0
+            if self.idle_timeout:
+                removed += db.execute('DELETE FROM sessions WHERE last_seen < ?',
+                                      (now - self.idle_timeout,)).rowcount
+            removed += db.execute('DELETE FROM sessions WHERE id IN (SELECT id FROM sessions '
+                                  'ORDER BY last_seen DESC LIMIT -1 OFFSET ?)', (self.max_sessions,)).rowcount
+        self.evictions += removed
+        return removed
+
+    def stats(self):
+        return {'backend': 'sqlite', 'sessions': len(self), 'max_sessions': self.max_sessions,
+                'evictions': self.evictions}
+
+
+def open_session_store(url, max_sessions=100000, idle_timeout=1800.0, max_bytes=None):
+    """
+    SessionStore for "memory" (or an empty url), SQLiteSessionStore for
+    "sqlite:///path/to/file.db"
+    """
+    if not url or url == 'memory':
+        return SessionStore(max_sessions, idle_timeout, max_bytes)
+    if url.startswith('sqlite:///'):
+        return SQLiteSessionStore(url[len('sqlite:///'):], max_sessions, idle_timeout)
+    raise ValueError(f"unknown session store {url!r}")
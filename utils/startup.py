@@ -0,0 +1,59 @@
+import importlib
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Startup:
+    """
+    Readiness state and import/warm-up timings for the app.
+
+    Heavy modules are imported through import_module() only when the backend
+    that needs them is enabled, and every phase is timed so cold-start
+    regressions show up at /ready.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timings = {}
+        self.state = 'starting'
+        self.error = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self.state == 'ready'
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.timings[name] = time.perf_counter() - start
+
+    def checkpoint(self, name):
+        """
+        Record the time elapsed since the Startup object was created
+        """
+        with self._lock:
+            self.timings[name] = time.perf_counter() - self.started
+
+    def import_module(self, name):
+        with self.phase(f'import {name}'):
+            return importlib.import_module(name)
+
+    def mark_ready(self):
+        self.timings['total'] = time.perf_counter() - self.started
+        self.state = 'ready'
+
+    def mark_failed(self, error):
+        self.timings['total'] = time.perf_counter() - self.started
+        self.error = f"{type(error).__name__}: {error}"
+        self.state = 'failed'
+
+    def status(self):
+        with self._lock:
+            timings = {name: round(1000.0 * seconds, 2) for name, seconds in self.timings.items()}
+        return {'state': self.state, 'error': self.error, 'timings_ms': timings}
@@ -0,0 +1,185 @@
+import asyncio
+import threading
+import time
+
+
+class StubSeq2Seq:
+    """
+    Tiny offline stand-in for the transformer generator.
+
+    Produces a short templated reply one word at a time with a fixed
+    per-token delay, so streaming, time-to-first-token and tokens/sec can be
+    exercised without downloading a model.
+    """
+
+    def __init__(self, token_delay=0.01):
+        self.token_delay = token_delay
+        # generate_batch models one accelerator: batches run one at a time
+        self._device = threading.Lock()
+
+    def _reply(self, prompt):
+        message = prompt.split(': ', 1)[-1]
+        return (f"Thank you for sharing that. It sounds like {message.rstrip('.!?')} "
+                "has been on your mind. Would you like to talk more about how it makes you feel?").split()
+
+    def stream(self, prompt, max_new_tokens=100):
+        for i, token in enumerate(self._reply(prompt)):
+            if i >= max_new_tokens:
+                break
+            time.sleep(self.token_delay)
+            yield token if i == 0 else ' ' + token
+
+    def generate_batch(self, messages, prefix='', max_new_tokens=100, max_time=None):
+        """
+        Replies for a batch of messages, with one token_delay per decoding
+        step for the whole batch as on a vectorized accelerator. Returns
+        (replies, timed_out).
+        """
+        replies = [self._reply(prefix + message)[:max_new_tokens] for message in messages]
+        deadline = time.perf_counter() + max_time if max_time else None
+        with self._device:
+            for step in range(max(len(r) for r in replies)):
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return [' '.join(r[:step]) for r in replies], True
+                time.sleep(self.token_delay)
+        return [' '.join(r) for r in replies], False
+
+
+class TransformerSeq2Seq:
+    """
+    Hugging Face seq2seq model (e.g. flan-t5-small) with token streaming
+    """
+
+    def __init__(self, model_path='models/chatbot_llm_model', tokenizer_path='models/chatbot_tokenizer',
+                 model=None, tokenizer=None):
+        if model is None:
+            from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+            tokenizer = AutoTokenizer.from_pretrained(tokenizer_path)
+            model = AutoModelForSeq2SeqLM.from_pretrained(model_path)
+        self.tokenizer = tokenizer
+        self.model = model.eval()
+        self._prefix_ids = {}
+
+    @classmethod
+    def tiny(cls, seed=0):
+        """
+        Randomly initialized two-layer T5 with the byte-level ByT5 tokenizer:
+        real generation code paths and costs, no download. Its replies are
+        gibberish; it is for benchmarks only.
+        """
+        import torch
+        from transformers import ByT5Tokenizer, T5Config, T5ForConditionalGeneration
+        torch.manual_seed(seed)
+        tokenizer = ByT5Tokenizer()
+        config = T5Config(vocab_size=len(tokenizer), d_model=64, d_kv=16, d_ff=128, num_layers=2,
+                          num_decoder_layers=2, num_heads=4, decoder_start_token_id=tokenizer.pad_token_id,
+                          pad_token_id=tokenizer.pad_token_id, eos_token_id=tokenizer.eos_token_id)
+        return cls(model=T5ForConditionalGeneration(config), tokenizer=tokenizer)
+
+    def stream(self, prompt, max_new_tokens=100):
+        from transformers import TextIteratorStreamer
+        inputs = self.tokenizer(prompt, return_tensors='pt')
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        thread = threading.Thread(
+            target=self.model.generate,
+            kwargs=dict(**inputs, max_new_tokens=max_new_tokens, streamer=streamer),
+            daemon=True,
+        )
+        thread.start()
+        for text in streamer:
+            if text:
+                yield text
+        thread.join()
+
+    def _encode(self, messages, prefix):
+        # The prefix is tokenized once and its ids reused for every prompt.
+        # T5's encoder is bidirectional, so the prefix's hidden states depend
+        # on the message and can't be cached the way a decoder's can.
+        prefix_ids = self._prefix_ids.get(prefix)
+        if prefix_ids is None:
+            prefix_ids = self._prefix_ids[prefix] = self.tokenizer(prefix, add_special_tokens=False).input_ids
+        encoded = self.tokenizer(list(messages))
+        return self.tokenizer.pad(
+            {'input_ids': [prefix_ids + ids for ids in encoded.input_ids]}, return_tensors='pt')
+
+    def generate_batch(self, messages, prefix='', max_new_tokens=100, max_time=None):
+        """
+        Replies for a padded batch of messages in one generate call.
+        Returns (replies, timed_out).
+        """
+        import torch
+        inputs = self._encode(messages, prefix)
+        started = time.perf_counter()
+        with torch.inference_mode():
+            output = self.model.generate(**inputs, max_new_tokens=max_new_tokens, max_time=max_time)
+        timed_out = max_time is not None and time.perf_counter() - started >= max_time
+        return self.tokenizer.batch_decode(output, skip_special_tokens=True), timed_out
+
+
+class StreamStats:
+    """
+    Time-to-first-token and tokens/sec for one generation
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_token = None
+        self.finished = None
+        self.tokens = 0
+
+    def on_token(self):
+        if self.first_token is None:
+            self.first_token = time.perf_counter()
+        self.tokens += 1
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    def as_dict(self):
+        finished = self.finished or time.perf_counter()
+        ttft = (self.first_token - self.started) if self.first_token else None
+        decode = finished - (self.first_token or self.started)
+        return {
+            'ttft_ms': 1000.0 * ttft if ttft is not None else None,
+            'total_ms': 1000.0 * (finished - self.started),
+            'tokens': self.tokens,
+            'tokens_per_sec': (self.tokens - 1) / decode if self.tokens > 1 and decode > 0 else None,
+        }
+
+
+async def stream_in_executor(make_stream, executor):
+    """
+    Run a blocking token generator on executor and yield its tokens to the
+    event loop as they are produced.
+
+    If the consumer stops early (client disconnected), the worker thread is
+    told to stop at the next token.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    done = object()
+    cancelled = threading.Event()
+
+    def produce():
+        try:
+            for token in make_stream():
+                if cancelled.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, token)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    future = loop.run_in_executor(executor, produce)
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        cancelled.set()
+        await asyncio.shield(future)
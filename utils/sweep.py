@@ -0,0 +1,155 @@
+import csv
+import itertools
+import json
+import math
+import os
+import random
+import time
+
+import numpy as np
+
+# Values a trial gets for any parameter the spec leaves out: train_model.py's
+DEFAULTS = {
+    'hidden': [128, 64],
+    'dropout': 0.5,
+    'learning_rate': 0.01,
+    'batch_size': 5,
+    'epochs': 200,
+}
+
+
+def expand_grid(params):
+    """
+    Every combination of the listed parameter values
+    """
+    names = sorted(params)
+    return [dict(zip(names, values)) for values in itertools.product(*(params[n] for n in names))]
+
+
+def sample_random(params, n_trials, seed=0):
+    """
+    n_trials distinct random combinations (all of them if there are fewer).
+    Each parameter is drawn independently, so the grid is never built.
+    """
+    rng = random.Random(seed)
+    names = sorted(params)
+    n_trials = min(n_trials, math.prod(len(params[n]) for n in names))
+    seen, configs = set(), []
+    while len(configs) < n_trials:
+        picks = tuple(rng.randrange(len(params[n])) for n in names)
+        if picks not in seen:
+            seen.add(picks)
+            configs.append({n: params[n][i] for n, i in zip(names, picks)})
+    return configs
+
+
+def trial_configs(spec):
+    """
+    Trial parameter dicts for a sweep spec:
+    {"search": "grid" | "random", "trials": N, "seed": 0, "params": {name: [values]}}
+    """
+    if spec.get('search', 'grid') == 'random':
+        configs = sample_random(spec['params'], spec.get('trials', 20), spec.get('seed', 0))
+    else:
+        configs = expand_grid(spec['params'])
+    return [dict(DEFAULTS, **config) for config in configs]
+
+
+def split_holdout(labels, fraction, seed=0):
+    """
+    (train, validation) row indices holding out about fraction of every
+    class, always leaving at least one example of each class for training
+    """
+    rng = np.random.default_rng(seed)
+    train, validation = [], []
+    for label in np.unique(labels):
+        rows = rng.permutation(np.flatnonzero(labels == label))
+        n_val = min(int(round(len(rows) * fraction)), len(rows) - 1)
+        validation.extend(rows[:n_val])
+        train.extend(rows[n_val:])
+    return np.sort(np.asarray(train, dtype=np.int64)), np.sort(np.asarray(validation, dtype=np.int64))
+
+
+_data = None
+
+
+def init_worker(data_path, threads):
+    """
+    Process pool initializer: load the shared train/validation split once
+    per worker and keep TensorFlow to its share of the cores
+    """
+    global _data
+    with np.load(data_path) as data:
+        _data = {name: data[name] for name in data.files}
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def run_trial(trial_id, config, patience, latency_samples=200):
+    """
+    Train one configuration with early stopping on the validation split.
+
+    Returns a leaderboard row: validation accuracy, wall-clock training
+    time, epochs run and the epoch whose weights were kept, parameter count, float32 weight size and the p50
+    latency of the NumPy sparse forward pass on single messages.
+    """
+    import tensorflow as tf
+    from utils.model_builder import build_model
+    from utils.numpy_model import NumpyIntentModel, dense_layers
+
+    train_x, train_y = _data['train_x'], _data['train_y']
+    val_x, val_y = _data['val_x'], _data['val_y']
+    n_classes = int(_data['n_classes'])
+
+    tf.keras.utils.set_random_seed(trial_id)
+    model = build_model(train_x.shape[1], n_classes, tuple(config['hidden']),
+                        config['dropout'], config['learning_rate'])
+    stop = tf.keras.callbacks.EarlyStopping(monitor='val_accuracy', patience=patience,
+                                            restore_best_weights=True)
+    started = time.perf_counter()
+    history = model.fit(train_x, train_y, validation_data=(val_x, val_y), epochs=config['epochs'],
+                        batch_size=config['batch_size'], callbacks=[stop], verbose=0)
+    train_seconds = time.perf_counter() - started
+
+    layers = dense_layers(model)
+    numpy_model = NumpyIntentModel(layers=layers)
+    rows = [np.flatnonzero(x) for x in val_x[:latency_samples]] or [np.flatnonzero(train_x[0])]
+    latencies = []
+    for columns in rows:
+        start = time.perf_counter()
+        numpy_model.predict_sparse([columns])
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    return {
+        'trial': trial_id,
+        'config': config,
+        'val_accuracy': float(max(history.history['val_accuracy'])),
+        'train_seconds': train_seconds,
+        'epochs_run': len(history.history['loss']),
+        # restore_best_weights keeps this epoch's weights
+        'best_epoch': int(np.argmax(history.history['val_accuracy'])) + 1,
+        'parameters': int(sum(W.size + b.size for W, b in layers)),
+        'weight_bytes': int(sum(W.nbytes + b.nbytes for W, b in layers)),
+        'p50_latency_ms': 1000 * latencies[len(latencies) // 2],
+    }
+
+
+def write_leaderboard(results, path):
+    """
+    Sort trials by validation accuracy (faster training breaking ties) and
+    write them as JSON, plus a CSV next to it
+    """
+    results = sorted(results, key=lambda r: (-r['val_accuracy'], r['train_seconds']))
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=4)
+    with open(os.path.splitext(path)[0] + '.csv', 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['rank', 'trial', 'val_accuracy', 'train_seconds', 'epochs_run', 'best_epoch',
+                         'parameters', 'weight_bytes', 'p50_latency_ms', 'config'])
+        for rank, r in enumerate(results, 1):
+            writer.writerow([rank, r['trial'], f"{r['val_accuracy']:.4f}", f"{r['train_seconds']:.2f}",
+                             r['epochs_run'], r['best_epoch'], r['parameters'], r['weight_bytes'],
+                             f"{r['p50_latency_ms']:.4f}", json.dumps(r['config'])])
+    return results
@@ -0,0 +1,173 @@
+import pickle
+import re
+
+# Word-level rules of NLTK's NLTKWordTokenizer (what nltk.word_tokenize, and
+# therefore train_model.py, uses), compiled once at import.
+_STARTING_QUOTES = [
+    (re.compile("([«“‘„]|[`]+)"), r" \1 "),
+    (re.compile(r'^"'), r"``"),
+    (re.compile(r"(``)"), r" \1 "),
+    (re.compile(r"([ \(\[{<])(\"|\'{2})"), r"\1 `` "),
+    (re.compile(r"(?i)(?<!\w)(\')(?!(?:re|ve|ll|m|t|s|d|n)\b)(?=\w)"), r"\1 "),
+]
+_PUNCTUATION = [
+    (re.compile(r'([^\.])(\.)([\]\)}>"\'' "»”’ " r"]*)\s*$"), r"\1 \2 \3 "),
+    (re.compile(r"([:,])([^\d])"), r" \1 \2"),
+    (re.compile(r"([:,])$"), r" \1 "),
+    (re.compile(r"\.{2,}"), r" \g<0> "),
+    (re.compile(r"[;@#$%&]"), r" \g<0> "),
+    (re.compile(r"[‒-―]"), r" \g<0> "),
+    (re.compile(r'([^\.])(\.)([\]\)}>"\']*)\s*$'), r"\1 \2\3 "),
+    (re.compile(r"[?!]"), r" \g<0> "),
+    (re.compile(r"([^'])' "), r"\1 ' "),
+    (re.compile(r"[*]"), r" \g<0> "),
+]
+_PARENS_BRACKETS = (re.compile(r"[\]\[\(\)\{\}\<\>]"), r" \g<0> ")
+_DOUBLE_DASHES = (re.compile(r"--"), r" -- ")
+_ENDING_QUOTES = [
+    (re.compile("([»”’])"), r" \1 "),
+    (re.compile(r"''"), " '' "),
+    (re.compile(r'"'), " '' "),
+    (re.compile(r"\s+"), " "),
+    (re.compile(r"([^' ])('[sS]|'[mM]|'[dD]|') "), r"\1 \2 "),
+    (re.compile(r"([^' ])('ll|'LL|'re|'RE|'ve|'VE|n't|N'T) "), r"\1 \2 "),
+]
+_CONTRACTIONS = [re.compile(p) for p in (
+    r"(?i)\b(can)(?#X)(not)\b", r"(?i)\b(d)(?#X)('ye)\b", r"(?i)\b(gim)(?#X)(me)\b",
+    r"(?i)\b(gon)(?#X)(na)\b", r"(?i)\b(got)(?#X)(ta)\b", r"(?i)\b(lem)(?#X)(me)\b",
+    r"(?i)\b(more)(?#X)('n)\b", r"(?i)\b(wan)(?#X)(na)(?=\s)",
+    r"(?i) ('t)(?#X)(is)\b", r"(?i) ('t)(?#X)(was)\b",
+)]
+
+# Stand-in for Punkt sentence splitting: a sentence ends at ., ! or ?
+# (plus closing quotes/brackets) followed by whitespace, unless the word
+# before the period is a common abbreviation or a single initial.
+_SENTENCE_END = re.compile(r"""([.!?]+['"”’)\]]*)\s+""")
+_ABBREVIATIONS = frozenset(['mr', 'mrs', 'ms', 'dr', 'prof', 'st', 'jr', 'sr', 'vs', 'etc',
+                            'e.g', 'i.e', 'a.m', 'p.m', 'u.s', 'no', 'inc', 'ltd'])
+_LAST_WORD = re.compile(r"([\w.]+)\.$")
+
+
+class RegexTokenizer:
+    """
+    Precompiled equivalent of nltk.word_tokenize that needs no NLTK data.
+
+    The word-level rules are NLTK's own; Punkt sentence splitting is
+    approximated with a regex, which matches it on ordinary chat text.
+    """
+
+    def sentences(self, text):
+        pieces = _SENTENCE_END.split(text)
+        # Reattach each terminator to the sentence it ends
+        parts = [''.join(pieces[i:i + 2]) for i in range(0, len(pieces), 2)]
+        merged = []
+        for part in parts:
+            if merged:
+                m = _LAST_WORD.search(merged[-1])
+                if m and (m.group(1).lower() in _ABBREVIATIONS or len(m.group(1)) == 1):
+                    merged[-1] = merged[-1] + ' ' + part
+                    continue
+            merged.append(part)
+        return [s for s in merged if s]
+
+    def tokenize_sentence(self, text):
+        for regexp, substitution in _STARTING_QUOTES:
+            text = regexp.sub(substitution, text)
+        for regexp, substitution in _PUNCTUATION:
+            text = regexp.sub(substitution, text)
+        regexp, substitution = _PARENS_BRACKETS
+        text = regexp.sub(substitution, text)
+        regexp, substitution = _DOUBLE_DASHES
+        text = regexp.sub(substitution, text)
+        text = " " + text + " "
+        for regexp, substitution in _ENDING_QUOTES:
+            text = regexp.sub(substitution, text)
+        for regexp in _CONTRACTIONS:
+            text = regexp.sub(r" \1 \2 ", text)
+        return text.split()
+
+    def tokenize(self, text):
+        return [token for sentence in self.sentences(text) for token in self.tokenize_sentence(sentence)]
+
+
+# WordNet's noun detachment rules, used to guess lemmas of unseen words
+# when WordNet itself is not available
+_NOUN_SUFFIXES = (('ses', 's'), ('xes', 'x'), ('zes', 'z'), ('ches', 'ch'),
+                  ('shes', 'sh'), ('men', 'man'), ('ies', 'y'), ('s', ''))
+
+
+class LemmaTable:
+    """
+    Lowercased token -> lemma lookups that avoid WordNet on the hot path.
+
+    frozen holds exact WordNet lemmas precomputed at train time and is never
+    evicted. Other tokens go through lemmatize (WordNet) once and are kept in
+    a bounded memo; with lemmatize=None WordNet is never touched and unseen
+    tokens fall back to WordNet's noun suffix rules, accepted only if they
+    produce a lemma already known to the table.
+    """
+
+    def __init__(self, frozen=None, lemmatize=None, max_size=100000):
+        self.frozen = dict(frozen or {})
+        self.lemmatize = lemmatize
+        self.max_size = max_size
+        self._memo = {}
+        self._known = set(self.frozen.values())
+
+    def seed(self, words):
+        """
+        Add every vocabulary word to the permanent table
+        """
+        for word in words:
+            if word not in self.frozen:
+                self.frozen[word] = self.lemmatize(word) if self.lemmatize else word
+        self._known.update(words)
+
+    def __len__(self):
+        return len(self.frozen) + len(self._memo)
+
+    def lemma(self, token):
+        lemma = self.frozen.get(token)
+        if lemma is not None:
+            return lemma
+        lemma = self._memo.get(token)
+        if lemma is not None:
+            return lemma
+        lemma = self.lemmatize(token) if self.lemmatize else self._guess(token)
+        if len(self._memo) >= self.max_size:
+            # Insertion-ordered dict: drop the oldest entry
+            self._memo.pop(next(iter(self._memo), None), None)
+        self._memo[token] = lemma
+        return lemma
+
+    def _guess(self, token):
+        for suffix, replacement in _NOUN_SUFFIXES:
+            if token.endswith(suffix):
+                candidate = token[:len(token) - len(suffix)] + replacement
+                if candidate in self._known:
+                    return candidate
+        return token
+
+
+class TextPreprocessor:
+    """
+    clean_up_sentence built from the regex tokenizer and a lemma table
+    """
+
+    def __init__(self, lemmas, tokenizer=None):
+        self.lemmas = lemmas
+        self.tokenizer = tokenizer or RegexTokenizer()
+
+    def clean_up_sentence(self, sentence):
+        lemma = self.lemmas.lemma
+        return [lemma(token.lower()) for token in self.tokenizer.tokenize(sentence)]
+
+
+def save_lemma_table(table, path):
+    with open(path, 'wb') as f:
+        pickle.dump(table, f)
+
+
+def load_lemma_table(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
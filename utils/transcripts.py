@@ -0,0 +1,285 @@
+import gzip
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+
+class _JsonlSink:
+    """
+    gzip-compressed JSONL, one member per flushed batch so a crash loses
+    at most the batch being written
+    """
+
+    suffix = '.jsonl.gz'
+
+    def __init__(self, path):
+        self._file = open(path, 'ab')
+
+    def write(self, records):
+        data = ''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in records).encode('utf-8')
+        self._file.write(gzip.compress(data, compresslevel=6))
+        self._file.flush()
+
+    def size(self):
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+
+class _ParquetSink:
+    """
+    Columnar Parquet (zstd), one row group per flushed batch. Needs pyarrow.
+    """
+
+    suffix = '.parquet'
+
+    def __init__(self, path):
+        import pyarrow
+        import pyarrow.parquet
+        self._pa = pyarrow
+        self._path = path
+        self._writer = None
+        self._pq = pyarrow.parquet
+        # Declared rather than inferred: a first batch where a column is all
+        # None (no session ids, no crisis yet) would type it as null and
+        # every later batch would fail to cast
+        self._schema = pyarrow.schema([
+            ('ts', pyarrow.float64()),
+            ('session_id', pyarrow.string()),
+            ('message', pyarrow.string()),
+            ('intents', pyarrow.string()),
+            ('crisis', pyarrow.string()),
+            ('safety_response', pyarrow.bool_()),
+            ('response', pyarrow.string()),
+            ('latency_ms', pyarrow.float64()),
+            ('model_generation', pyarrow.int64()),
+            ('model_version', pyarrow.string()),
+        ])
+
+    def write(self, records):
+        # Nested fields (intents) are stored as JSON text
+        columns = {}
+        for field in self._schema:
+            values = [r.get(field.name) for r in records]
+            if field.name == 'intents':
+                values = [json.dumps(v) for v in values]
+            columns[field.name] = values
+        table = self._pa.Table.from_pydict(columns, schema=self._schema)
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self._path, self._schema, compression='zstd')
+        self._writer.write_table(table)
+
+    def size(self):
+        return os.path.getsize(self._path) if os.path.exists(self._path) else 0
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+SINKS = {'jsonl': _JsonlSink, 'parquet': _ParquetSink}
+
+
+class TranscriptLogger:
+    """
+    Chat transcripts written off the request path.
+
+    log() only appends to an in-memory queue. A background thread drains it
+    in batches of up to batch_size (or every flush_interval seconds) into
+    compressed files under directory, starting a new file past rotate_bytes.
+    The normal queue is bounded: when the disk falls behind, new records are
+    dropped and counted instead of blocking requests. Crisis records go
+    through their own unbounded lane, drained first, and are never dropped:
+    after a failed write they are requeued and retried in a fresh file with
+    exponential backoff (up to max_backoff seconds). close() (also run at
+    exit) flushes everything still queued; crisis records that still can't
+    be written go to stderr as JSON lines rather than being lost.
+    """
+
+    def __init__(self, directory, fmt='jsonl', max_queue=10000, batch_size=256, flush_interval=1.0,
+                 rotate_bytes=64 * 1024 * 1024, max_backoff=30.0):
+        if fmt not in SINKS:
+            raise ValueError(f"unknown transcript format {fmt!r}")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.sink_class = SINKS[fmt]
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.rotate_bytes = rotate_bytes
+        self.max_backoff = max_backoff
+        self._backoff = 0.0
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._crisis = queue.Queue()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._closed = False
+        self._sink = None
+        self._sequence = 0
+
+        # Metrics
+        self._logged = 0
+        self._written = 0
+        self._crisis_written = 0
+        self._dropped = 0
+        self._write_errors = 0
+        self._crisis_to_stderr = 0
+        self._batches = 0
+        self._files = 0
+        self._write_total = 0.0
+        self._max_queue_depth = 0
+
+    def _ensure_writer(self):
+        # Threads do not survive a fork; each gunicorn worker writes its own files
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self.max_queue)
+                self._crisis = queue.Queue()
+                self._sink = None
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='transcript-writer', daemon=True)
+            self._thread.start()
+
+    def log(self, record, crisis=False):
+        """
+        Queue one exchange without blocking; returns False if it was dropped
+        """
+        if self._closed:
+            return False
+        self._ensure_writer()
+        self._logged += 1
+        if crisis:
+            self._crisis.put(record)
+            self._wake.set()
+            return True
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self._dropped += 1
+            return False
+        depth = self._queue.qsize()
+        if depth > self._max_queue_depth:
+            self._max_queue_depth = depth
+        if depth >= self.batch_size:
+            self._wake.set()
+        return True
+
+    def _drain(self):
+        """
+        Up to batch_size records, crisis lane first, and how many of them
+        came from the crisis lane
+        """
+        batch = []
+        n_crisis = 0
+        for lane in (self._crisis, self._queue):
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(lane.get_nowait())
+                except queue.Empty:
+                    break
+            if lane is self._crisis:
+                n_crisis = len(batch)
+        return batch, n_crisis
+
+    def _open_sink(self):
+        self._sequence += 1
+        name = f"transcripts-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._sequence:04d}"
+        self._sink = self.sink_class(os.path.join(self.directory, name + self.sink_class.suffix))
+        self._files += 1
+
+    def _write(self, batch, n_crisis):
+        if self._sink is None:
+            self._open_sink()
+        started = time.perf_counter()
+        try:
+            self._sink.write(batch)
+        except Exception as e:
+            print(f"Error writing transcripts: {e}")
+            self._write_errors += 1
+            # Crisis records go back to their lane for a retry; the rest are shed
+            for record in batch[:n_crisis]:
+                self._crisis.put(record)
+            self._dropped += len(batch) - n_crisis
+            # Retry in a new file rather than appending to a possibly damaged one
+            try:
+                self._sink.close()
+            except Exception:
+                pass
+            self._sink = None
+            self._backoff = min(max(2 * self._backoff, 0.1), self.max_backoff)
+            return False
+        self._backoff = 0.0
+        self._write_total += time.perf_counter() - started
+        self._batches += 1
+        self._written += len(batch)
+        self._crisis_written += n_crisis
+        if self._sink.size() >= self.rotate_bytes:
+            self._sink.close()
+            self._sink = None
+        return True
+
+    def _run(self):
+        while True:
+            if self._backoff:
+                # A wakeup doesn't cut the backoff short
+                time.sleep(self._backoff)
+            else:
+                self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            while True:
+                batch, n_crisis = self._drain()
+                if not batch or not self._write(batch, n_crisis):
+                    break
+            if self._closed and not self._crisis.qsize():
+                if self._sink is not None:
+                    self._sink.close()
+                    self._sink = None
+                return
+
+    def close(self, timeout=10.0):
+        """
+        Stop accepting records and wait for everything queued to be written
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+        # Last resort for crisis records the disk would not take
+        while True:
+            try:
+                record = self._crisis.get_nowait()
+            except queue.Empty:
+                break
+            sys.stderr.write('transcript-crisis ' + json.dumps(record, ensure_ascii=False) + '\n')
+            self._crisis_to_stderr += 1
+        sys.stderr.flush()
+
+    def stats(self):
+        batches = self._batches
+        return {
+            'logged': self._logged,
+            'written': self._written,
+            'crisis_written': self._crisis_written,
+            'dropped': self._dropped,
+            'write_errors': self._write_errors,
+            'crisis_to_stderr': self._crisis_to_stderr,
+            'queue_depth': self._queue.qsize(),
+            'crisis_queue_depth': self._crisis.qsize(),
+            'max_queue_depth': self._max_queue_depth,
+            'batches': batches,
+            'files': self._files,
+            'mean_write_ms': 1000.0 * self._write_total / batches if batches else 0.0,
+        }